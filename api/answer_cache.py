@@ -0,0 +1,170 @@
+"""
+Semantischer Antwort-Cache für /ask
+"""
+
+import re
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_question(question: str) -> str:
+    """Kleinschreibung, Whitespace zusammenfassen, Satzzeichen am Ende entfernen"""
+    text = re.sub(r"\s+", " ", question.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+class CacheEntry:
+    __slots__ = ("book_id", "question", "params", "embedding", "response", "created_at", "hits")
+
+    def __init__(self, book_id, question, params, embedding, response):
+        self.book_id = book_id
+        self.question = question
+        self.params = params
+        self.embedding = embedding
+        self.response = response
+        self.created_at = time.monotonic()
+        self.hits = 0
+
+
+class AnswerCache:
+    """LRU/TTL-Cache für generierte Antworten, pro Buch invalidierbar.
+
+    Treffer gibt es bei identischer normalisierter Frage oder wenn die
+    Kosinus-Ähnlichkeit der Frage-Embeddings similarity_threshold erreicht.
+    params enthält alle weiteren Request-Parameter, die die Antwort
+    beeinflussen (z.B. max_results) und muss exakt übereinstimmen.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()  # (book_id, frage, params) -> CacheEntry, LRU-Reihenfolge
+        self._by_book = {}  # book_id -> {key: CacheEntry}
+        self._book_versions = {}
+        self._hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def book_version(self, book_id: str) -> int:
+        """Vor der Generierung merken und an put() übergeben"""
+        return self._book_versions.get(book_id, 0)
+
+    def get(self, book_id: str, question: str, embedding, params=()):
+        """Liefert (response, similarity) oder None"""
+        if self.max_entries <= 0:
+            return None
+
+        norm = normalize_question(question)
+        key = (book_id, norm, params)
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            self._remove(key)
+            entry = None
+
+        similarity = 1.0
+        if entry is None:
+            entry, similarity = self._find_similar(book_id, params, embedding)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        if similarity < 1.0:
+            self._semantic_hits += 1
+        self._hits += 1
+        entry.hits += 1
+        self._entries.move_to_end((entry.book_id, entry.question, entry.params))
+        return entry.response, similarity
+
+    def put(self, book_id: str, question: str, embedding, response, params=(), version=None):
+        if self.max_entries <= 0:
+            return
+        # Buch wurde während der Generierung geändert -> Antwort verwerfen
+        if version is not None and version != self.book_version(book_id):
+            return
+
+        norm = normalize_question(question)
+        key = (book_id, norm, params)
+        if key in self._entries:
+            self._remove(key)
+
+        entry = CacheEntry(book_id, norm, params, self._unit(embedding), response)
+        self._entries[key] = entry
+        self._by_book.setdefault(book_id, {})[key] = entry
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def invalidate_book(self, book_id: str) -> int:
+        """Alle Antworten zu einem Buch verwerfen"""
+        self._book_versions[book_id] = self.book_version(book_id) + 1
+        keys = list(self._by_book.get(book_id, {}))
+        for key in keys:
+            self._remove(key)
+        self._invalidations += 1
+        return len(keys)
+
+    def stats(self):
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "hits": self._hits,
+            "semantic_hits": self._semantic_hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups, 3) if lookups else 0,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+        }
+
+    #----------------------------------------
+
+    def _find_similar(self, book_id, params, embedding):
+        candidates = [
+            (key, entry) for key, entry in self._by_book.get(book_id, {}).items()
+            if entry.params == params
+        ]
+        if not candidates:
+            return None, 0.0
+
+        expired = [key for key, entry in candidates if self._expired(entry)]
+        for key in expired:
+            self._remove(key)
+        candidates = [(key, entry) for key, entry in candidates if key not in expired]
+        if not candidates:
+            return None, 0.0
+
+        matrix = np.stack([entry.embedding for _, entry in candidates])
+        similarities = matrix @ self._unit(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None, 0.0
+        return candidates[best][1], float(similarities[best])
+
+    def _expired(self, entry):
+        return self.ttl > 0 and time.monotonic() - entry.created_at > self.ttl
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        book_entries = self._by_book.get(entry.book_id)
+        if book_entries is not None:
+            book_entries.pop(key, None)
+            if not book_entries:
+                del self._by_book[entry.book_id]
+
+    @staticmethod
+    def _unit(embedding):
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
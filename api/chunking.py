@@ -0,0 +1,129 @@
+"""
+Gemeinsames Chunking für API und Skripte
+
+Strategien:
+  sentence          Sätze zu Chunks mit höchstens chunk_size Wörtern
+  sentence_overlap  wie sentence, jeder Chunk beginnt mit den letzten Sätzen
+                    des vorigen (höchstens overlap Wörter)
+  tokens            Sätze zu Chunks mit höchstens max_tokens Tokens des
+                    Embedding-Tokenizers (optional mit Überlappung)
+
+Alle Strategien laufen in linearer Zeit: Wort- bzw. Tokenzahl wird pro Satz
+einmal bestimmt und als laufende Summe geführt.
+"""
+
+import threading
+from collections import deque
+
+from nltk.tokenize import sent_tokenize
+
+from resources import ensure_punkt, resolve_model
+
+DEFAULT_STRATEGY = "sentence"
+DEFAULT_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def split_sentences(text: str):
+    ensure_punkt()
+    return sent_tokenize(text)
+
+
+def pack_sentences(sentences, sizes, budget: int, overlap: int = 0):
+    """Sätze mit Größe sizes[i] zu Chunks packen, die budget nicht überschreiten.
+
+    Ein einzelner Satz über dem Budget wird ein eigener Chunk. Mit overlap > 0
+    werden die letzten Sätze des vorigen Chunks (zusammen höchstens overlap)
+    an den Anfang des nächsten übernommen.
+    """
+    chunks = []
+    current = deque()
+    current_size = 0
+
+    for sentence, size in zip(sentences, sizes):
+        if current and current_size + size > budget:
+            chunks.append(" ".join(s for s, _ in current))
+
+            # Überlappung: vom Ende her Sätze behalten, solange sie passen
+            if overlap > 0:
+                kept_size = 0
+                kept = deque()
+                while current and kept_size + current[-1][1] <= overlap and kept_size + current[-1][1] + size <= budget:
+                    s = current.pop()
+                    kept.appendleft(s)
+                    kept_size += s[1]
+                current, current_size = kept, kept_size
+            else:
+                current.clear()
+                current_size = 0
+
+        current.append((sentence, size))
+        current_size += size
+
+    if current:
+        chunks.append(" ".join(s for s, _ in current))
+
+    return chunks
+
+
+def chunk_by_sentences(text: str, chunk_size: int = 100):
+    sentences = split_sentences(text)
+    return pack_sentences(sentences, [len(s.split()) for s in sentences], chunk_size)
+
+
+def chunk_by_sentences_with_overlap(text: str, chunk_size: int = 100, overlap: int = 20):
+    sentences = split_sentences(text)
+    return pack_sentences(sentences, [len(s.split()) for s in sentences], chunk_size, overlap)
+
+
+def create_tokenizer(name: str = DEFAULT_TOKENIZER):
+    """Eigene Tokenizer-Instanz; der Rust-Tokenizer darf nicht zwischen Threads geteilt werden"""
+    from transformers import AutoTokenizer
+    path = resolve_model(name)
+    if path == name and "/" not in name:
+        # Kurzname wie bei SentenceTransformer ("all-MiniLM-L6-v2")
+        path = f"sentence-transformers/{name}"
+    return AutoTokenizer.from_pretrained(path)
+
+
+_local = threading.local()
+
+
+def load_tokenizer(name: str = DEFAULT_TOKENIZER):
+    """Tokenizer des Embedding-Modells, einmal pro Thread geladen.
+
+    Extraktions-Threads mehrerer Jobs chunken gleichzeitig; jeder bekommt
+    eine eigene Instanz statt einer prozessweit geteilten.
+    """
+    tokenizers = _local.__dict__.setdefault("tokenizers", {})
+    if name not in tokenizers:
+        tokenizers[name] = create_tokenizer(name)
+    return tokenizers[name]
+
+
+def chunk_by_tokens(text: str, max_tokens: int = 200, overlap: int = 0, tokenizer: str = DEFAULT_TOKENIZER):
+    """Chunks nach Modell-Tokens statt Wörtern, passend zu max_seq_length des Embedders"""
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+    encoded = load_tokenizer(tokenizer)(sentences, add_special_tokens=False)["input_ids"]
+    return pack_sentences(sentences, [len(ids) for ids in encoded], max_tokens, overlap)
+
+
+STRATEGIES = {
+    "sentence": chunk_by_sentences,
+    "sentence_overlap": chunk_by_sentences_with_overlap,
+    "tokens": chunk_by_tokens,
+}
+
+
+def chunk_text(text: str, strategy: str = DEFAULT_STRATEGY, **options):
+    """Text mit der gewählten Strategie zerlegen; options gehen an die Strategie"""
+    try:
+        chunker = STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unbekannte Chunking-Strategie '{strategy}' (verfügbar: {', '.join(STRATEGIES)})")
+    return chunker(text, **options)
+
+
+def chunk_text_by_sentences(text, chunk_size=100):
+    return chunk_by_sentences(text, chunk_size=chunk_size)
@@ -0,0 +1,117 @@
+"""
+Kontext für den LLM-Prompt: Token-Budget, fast gleiche Chunks entfernen, Nachbar-Chunks
+
+Die Prompt-Länge bestimmt die Dauer der Ollama-Anfrage am stärksten. Die
+Treffer werden in Rangfolge übernommen, bis das Budget voll ist; Chunks, deren
+Embedding einem schon gewählten fast gleicht (Überlappung, Textbausteine),
+fallen weg.
+"""
+
+import numpy as np
+
+DEFAULT_TOKEN_BUDGET = 1500
+DEFAULT_DEDUP_SIMILARITY = 0.95
+
+
+def token_counter(tokenizer):
+    """Tokens zählen, für eine Liste von Texten in einem Aufruf.
+
+    Der Tokenizer des Embedding-Modells ist nicht der des LLM, für das Budget
+    reicht die Schätzung; die echte Zahl meldet Ollama (prompt_eval_count).
+    """
+    def count(texts):
+        if not texts:
+            return []
+        return [len(ids) for ids in tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]]
+
+    return count
+
+
+def _unit(embedding):
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _truncate(text: str, tokens: int, budget: int) -> str:
+    """Text anteilig auf das Budget kürzen (wortweise)"""
+    words = text.split()
+    return " ".join(words[:max(1, len(words) * budget // tokens)])
+
+
+def build_context(results, count_tokens, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                  dedup_similarity: float = DEFAULT_DEDUP_SIMILARITY):
+    """Treffer zu Kontext-Passagen zusammenstellen.
+
+    results: Suchergebnisse in Rangfolge mit content, chunk_id, optional
+    embedding und (mit Nachbarn) neighbor_ids/neighbor_contents.
+    Nachbarn werden in chunk_id-Reihenfolge um den Treffer gelegt und nur
+    übernommen, wenn sie ins Budget passen. Ein Chunk kommt nie doppelt vor.
+    token_budget <= 0 heißt ohne Begrenzung; dedup_similarity >= 1 schaltet
+    das Entfernen fast gleicher Chunks ab.
+
+    Chunks werden über (page_number, chunk_id) identifiziert, da chunk_id bei
+    PDFs auf jeder Seite wieder bei 0 beginnt; Nachbarn liegen auf derselben
+    Seite wie ihr Treffer.
+
+    Gibt (verwendete Treffer, Passagen, Statistik) zurück.
+    """
+    texts = {}
+    for result in results:
+        page = result['page_number']
+        texts[(page, result['chunk_id'])] = result['content']
+        for chunk_id, content in zip(result.get('neighbor_ids') or [], result.get('neighbor_contents') or []):
+            texts.setdefault((page, chunk_id), content)
+    tokens = dict(zip(texts, count_tokens(list(texts.values()))))
+
+    used_ids = set()
+    used_vectors = []
+    selected, passages = [], []
+    stats = {"token_budget": token_budget, "context_tokens": 0, "duplicates_dropped": 0,
+             "over_budget_dropped": 0, "neighbors_added": 0}
+    remaining = token_budget if token_budget > 0 else float("inf")
+
+    for result in results:
+        page = result['page_number']
+        key = (page, result['chunk_id'])
+        if key in used_ids:
+            # Schon als Nachbar eines besseren Treffers im Kontext
+            stats["duplicates_dropped"] += 1
+            continue
+
+        vector = None
+        if dedup_similarity < 1 and result.get('embedding') is not None:
+            vector = _unit(result['embedding'])
+            if used_vectors and float(np.max(np.stack(used_vectors) @ vector)) >= dedup_similarity:
+                stats["duplicates_dropped"] += 1
+                continue
+
+        text = result['content']
+        cost = tokens[key]
+        if cost > remaining:
+            if selected:
+                stats["over_budget_dropped"] += 1
+                continue
+            # Bester Treffer allein zu lang: gekürzt statt ohne Kontext antworten
+            text, cost = _truncate(text, cost, remaining), remaining
+
+        # Nachbarn, die noch ins Budget passen, um den Treffer legen
+        parts = {key: text}
+        for neighbor_id in result.get('neighbor_ids') or []:
+            neighbor = (page, neighbor_id)
+            if neighbor in used_ids or tokens[neighbor] > remaining - cost:
+                continue
+            parts[neighbor] = texts[neighbor]
+            cost += tokens[neighbor]
+            stats["neighbors_added"] += 1
+
+        used_ids.update(parts)
+        if vector is not None:
+            used_vectors.append(vector)
+        selected.append(result)
+        passages.append(" ".join(parts[k] for k in sorted(parts, key=lambda k: k[1])))
+        remaining -= cost
+        stats["context_tokens"] += cost
+
+    stats["chunks_used"] = len(selected)
+    return selected, passages, stats
@@ -0,0 +1,192 @@
+"""
+Embedding-Ausführung außerhalb des Event-Loops
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from metrics import EMBED_BATCH_SIZE, EMBED_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingQueueFull(Exception):
+    """Alle Worker belegt und Warteschlange voll"""
+
+
+class EmbeddingExecutor:
+    """Führt embedder.encode in einem eigenen Thread-Pool aus.
+
+    max_workers begrenzt die parallelen encode-Aufrufe, queue_size die Anzahl
+    der Aufträge, die zusätzlich warten dürfen. Ist beides ausgeschöpft, wird
+    sofort EmbeddingQueueFull geworfen statt den Aufrufer hängen zu lassen.
+    """
+
+    def __init__(self, model, max_workers: int = 2, queue_size: int = 32, name: str = "query"):
+        self.model = model
+        self.name = name  # Label in den Metriken
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embed")
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._rejected = 0
+
+    async def encode(self, texts, **kwargs):
+        if self._pending >= self.max_workers + self.queue_size:
+            self._rejected += 1
+            raise EmbeddingQueueFull(
+                f"Embedding-Warteschlange voll ({self._pending} Aufträge)"
+            )
+
+        # Ein Auftrag zählt, bis der Thread fertig ist - auch wenn der Aufrufer
+        # vorher abbricht (ein laufendes encode lässt sich nicht abbrechen)
+        self._pending += 1
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        future = self._pool.submit(partial(self.model.encode, texts, **kwargs))
+        future.add_done_callback(
+            lambda f: self._call_in_loop(loop, self._finished, f, len(texts), started)
+        )
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _call_in_loop(loop, callback, *args):
+        # Done-Callbacks laufen im Worker-Thread; Zähler und Metriken nur im Event-Loop ändern
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # Event-Loop schon geschlossen (Shutdown)
+
+    def _finished(self, future, batch_size: int, started: float):
+        self._pending -= 1
+        if future.cancelled():
+            # Vor dem Start abgebrochen, es wurde nichts kodiert
+            self._cancelled += 1
+            return
+        if future.exception() is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+        EMBED_BATCH_SIZE.observe(batch_size, executor=self.name)
+        EMBED_SECONDS.observe(time.perf_counter() - started, executor=self.name)
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "pending": self._pending,
+            "completed": self._completed,
+            "failed": self._failed,
+            "cancelled": self._cancelled,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class EmbeddingBatcher:
+    """Sammelt einzelne Fragen und kodiert sie gemeinsam (Micro-Batching).
+
+    Ein Batch wird abgeschickt, sobald max_batch_size Texte warten oder der
+    älteste Text max_wait_ms alt ist. Jeder Aufrufer bekommt sein eigenes
+    Embedding zurück.
+    """
+
+    def __init__(self, executor: EmbeddingExecutor, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._waiting = []  # (text, future, enqueued_at)
+        self._timer = None
+        self._tasks = set()
+
+        # Statistik
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._batch_sizes = {}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def encode_one(self, text: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting.append((text, future, loop.time()))
+
+        if len(self._waiting) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # Abgebrochene Aufrufer nicht mehr mitkodieren
+        self._waiting = [w for w in self._waiting if not w[1].done()]
+        if not self._waiting:
+            return
+
+        batch = self._waiting[:self.max_batch_size]
+        self._waiting = self._waiting[self.max_batch_size:]
+
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        if self._waiting:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+    async def _run(self, batch):
+        now = asyncio.get_running_loop().time()
+        for _, _, enqueued_at in batch:
+            wait = now - enqueued_at
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+
+        size = len(batch)
+        self._batches += 1
+        self._items += size
+        self._max_batch = max(self._max_batch, size)
+        self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+
+        try:
+            embeddings = await self.executor.encode([text for text, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "waiting": len(self._waiting),
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0,
+            "max_batch": self._max_batch,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "avg_queue_wait_ms": round(self._wait_total / self._items * 1000, 3) if self._items else 0,
+            "max_queue_wait_ms": round(self._wait_max * 1000, 3),
+        }
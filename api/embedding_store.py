@@ -0,0 +1,124 @@
+"""
+Inhaltsadressierter Embedding-Speicher
+
+Embeddings werden unter einem Hash aus Modellname und normalisiertem Text in
+der Tabelle embedding_store abgelegt. Korrigierte Neuauflagen und wiederkehrende
+Textbausteine (Vorworte, Impressum, Reihentexte) müssen so nicht erneut
+berechnet werden.
+"""
+
+import hashlib
+import logging
+import re
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-Normalform und Leerraum vereinheitlichen (PDF-Umbrüche, doppelte Leerzeichen)"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_hash(model_name: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model_name}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+class EmbeddingStore:
+    """Nachschlagen und Ablegen von Embeddings über den Datenbank-Pool.
+
+    Nutzt eigene (autocommit) Verbindungen, unabhängig von der Transaktion des
+    Uploads: Was einmal berechnet wurde, bleibt auch erhalten, wenn der Upload
+    danach scheitert.
+    """
+
+    def __init__(self, pool, model_name: str):
+        self.pool = pool
+        self.model_name = model_name
+        self._hits = 0
+        self._misses = 0
+
+    def hash(self, text: str) -> bytes:
+        return content_hash(self.model_name, text)
+
+    async def lookup(self, hashes):
+        """Bekannte Embeddings in einer Abfrage holen -> {hash: embedding}"""
+        if not hashes:
+            return {}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT content_hash, embedding
+                FROM embedding_store
+                WHERE content_hash = ANY($1::bytea[])
+            """, list(hashes))
+        return {bytes(row['content_hash']): row['embedding'] for row in rows}
+
+    async def save(self, hashes, embeddings):
+        if not hashes:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.executemany("""
+                INSERT INTO embedding_store (content_hash, model, embedding)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (content_hash) DO NOTHING
+            """, [(h, self.model_name, e) for h, e in zip(hashes, embeddings)])
+
+    def encoder(self, encode):
+        """encode(texts) mit Speicher davor; Zähler gelten pro Upload"""
+        return CachedEncoder(self, encode)
+
+    def record(self, hits: int, misses: int):
+        self._hits += hits
+        self._misses += misses
+
+    def stats(self):
+        total = self._hits + self._misses
+        return {
+            "model": self.model_name,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / total, 4) if total else 0,
+        }
+
+
+class CachedEncoder:
+    """Ersetzt encode(texts) in der Ingestion: nur unbekannte Texte werden embedded"""
+
+    def __init__(self, store: EmbeddingStore, encode):
+        self.store = store
+        self.encode = encode
+        self.hits = 0
+        self.misses = 0
+
+    async def __call__(self, texts):
+        hashes = [self.store.hash(text) for text in texts]
+        known = await self.store.lookup(set(hashes))
+
+        # Fehlende Texte je Hash nur einmal berechnen (Dubletten im selben Batch)
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in known and h not in missing:
+                missing[h] = text
+
+        if missing:
+            missing_hashes = list(missing)
+            embeddings = await self.encode(list(missing.values()))
+            await self.store.save(missing_hashes, embeddings)
+            known.update(zip(missing_hashes, embeddings))
+
+        misses = len(missing)
+        hits = len(texts) - misses
+        self.hits += hits
+        self.misses += misses
+        self.store.record(hits, misses)
+        return [known[h] for h in hashes]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0,
+        }
@@ -0,0 +1,433 @@
+"""
+Text-Extraktion, Chunking und die Ingestion-Pipeline für Uploads
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+
+import fitz  # PyMuPDF
+from docx import Document
+
+from chunking import chunk_text
+
+logger = logging.getLogger(__name__)
+
+#----------------------------------------
+# Seitenweises Lesen und Chunken aus der abgelegten Datei
+#----------------------------------------
+
+def iter_pdf_pages(path: str):
+    """(seite, text, seitenzahl) je PDF-Seite, es liegt immer nur eine Seite im Speicher"""
+    with fitz.open(path) as doc:
+        page_count = len(doc)
+        for page_num in range(page_count):
+            yield page_num + 1, doc[page_num].get_text(), page_count
+
+def extract_page_range(path: str, start: int, end: int, chunking: dict = None):
+    """Worker für den Prozess-Pool: Seiten [start, end) öffnen, lesen und chunken.
+    
+    Jeder Prozess öffnet das Dokument selbst aus der abgelegten Datei,
+    übertragen werden nur Pfad und Seitenbereich bzw. die fertigen Chunks.
+    """
+    pages = []
+    with fitz.open(path) as doc:
+        for page_num in range(start, end):
+            text = doc[page_num].get_text()
+            chunks = chunk_text(text, **(chunking or {})) if text.strip() else []
+            pages.append((page_num + 1, chunks))
+    return pages
+
+def iter_pdf_page_chunks(path: str, chunking: dict = None, pool=None, shard_pages: int = 16, max_inflight: int = 8):
+    """(seite, chunks, seitenzahl) in Seitenreihenfolge.
+    
+    Mit pool (ProcessPoolExecutor) werden Seitenbereiche à shard_pages Seiten
+    parallel verarbeitet; höchstens max_inflight Bereiche sind gleichzeitig
+    unterwegs, damit der Speicher auch bei großen Büchern begrenzt bleibt.
+    """
+    if pool is None:
+        for page, text, page_count in iter_pdf_pages(path):
+            chunks = chunk_text(text, **(chunking or {})) if text.strip() else []
+            yield page, chunks, page_count
+        return
+
+    with fitz.open(path) as doc:
+        page_count = len(doc)
+    shards = iter([(start, min(start + shard_pages, page_count))
+                   for start in range(0, page_count, shard_pages)])
+
+    pending = collections.deque()
+    try:
+        for start, end in itertools.islice(shards, max_inflight):
+            pending.append(pool.submit(extract_page_range, path, start, end, chunking))
+
+        while pending:
+            pages = pending.popleft().result()
+            next_shard = next(shards, None)
+            if next_shard:
+                pending.append(pool.submit(extract_page_range, path, *next_shard, chunking))
+            for page, chunks in pages:
+                yield page, chunks, page_count
+    finally:
+        for future in pending:
+            future.cancel()
+
+# Word/Klartext: höchstens etwa so viele Wörter auf einmal chunken
+TEXT_BLOCK_WORDS = 2000
+
+def _word_blocks(paragraphs, max_words: int):
+    """Absätze zu Blöcken von etwa max_words Wörtern zusammenfassen (Zeilenumbruch dazwischen)"""
+    block, words = [], 0
+    for para in paragraphs:
+        block.append(para)
+        words += len(para.split())
+        if words >= max_words:
+            yield "\n".join(block)
+            block, words = [], 0
+    if block:
+        yield "\n".join(block)
+
+def iter_docx_page_chunks(path: str, chunking: dict = None, block_words: int = TEXT_BLOCK_WORDS):
+    """Word hat keine Seiten: Absätze blockweise chunken, Seitenzahl geschätzt.
+    
+    python-docx hält das XML des Dokuments im Speicher; der zusammengesetzte
+    Text und die Chunks entstehen aber nur je Block von block_words Wörtern.
+    """
+    doc = Document(path)
+
+    def paragraphs():
+        for para in doc.paragraphs:
+            text = para.text
+            if text.strip():
+                yield text
+
+    page_count = max(1, sum(len(text.split()) for text in paragraphs()) // 500)
+    for block in _word_blocks(paragraphs(), block_words):
+        yield None, chunk_text(block, **(chunking or {})), page_count
+
+def _txt_paragraphs(f, max_words: int):
+    """Absätze (durch Leerzeilen getrennt) zeilenweise lesen; sehr lange Absätze nach max_words teilen"""
+    lines, words = [], 0
+    for line in f:
+        if line.strip():
+            lines.append(line)
+            words += len(line.split())
+            if words < max_words:
+                continue
+        if lines:
+            yield "".join(lines).strip()
+            lines, words = [], 0
+    if lines:
+        yield "".join(lines).strip()
+
+def iter_txt_page_chunks(path: str, chunking: dict = None, block_words: int = TEXT_BLOCK_WORDS):
+    """Klartext: absatzweise chunken (wie chunk_txt_with_metadata), Seitenzahl geschätzt.
+    
+    Die Datei wird zeilenweise gelesen (ein Durchgang zum Zählen der Wörter,
+    einer zum Chunken), im Speicher liegt immer nur ein Absatz.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        page_count = max(1, sum(len(line.split()) for line in f) // 500)
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for para in _txt_paragraphs(f, block_words):
+            yield None, chunk_text(para, **(chunking or {})), page_count
+
+def iter_page_chunks(path: str, filename: str, chunking: dict = None, pool=None, shard_pages: int = 16):
+    """chunking: Optionen für chunking.chunk_text, z.B. {"strategy": "sentence", "chunk_size": 100}"""
+    if filename.lower().endswith(".pdf"):
+        return iter_pdf_page_chunks(path, chunking=chunking, pool=pool, shard_pages=shard_pages)
+    if filename.lower().endswith(".docx"):
+        return iter_docx_page_chunks(path, chunking=chunking)
+    if filename.lower().endswith(".txt"):
+        return iter_txt_page_chunks(path, chunking=chunking)
+    raise ValueError(f"Nicht unterstütztes Format: {filename}")
+
+def chunk_pdf_file(path: str, chunking: dict = None, pool=None, shard_pages: int = 16):
+    """Wie chunk_pdf_with_metadata, aber aus einer Datei und optional parallel"""
+    all_chunks = []
+    page_count = 0
+    for page, chunks, page_count in iter_pdf_page_chunks(path, chunking, pool, shard_pages):
+        for i, chunk in enumerate(chunks):
+            all_chunks.append({"page": page, "chunk_index": i, "text": chunk})
+    return all_chunks, page_count
+
+def chunk_file(path: str, filename: str, chunking: dict = None, pool=None, shard_pages: int = 16):
+    """Alle Chunks einer Datei mit denselben Indizes wie run_pipeline -> (chunks, seitenzahl)"""
+    all_chunks = []
+    page_count = 0
+    chunk_index = 0
+    for page, chunks, page_count in iter_page_chunks(path, filename, chunking, pool, shard_pages):
+        for i, chunk in enumerate(chunks):
+            # PDF: Index pro Seite, DOCX: fortlaufend
+            all_chunks.append({
+                "page": page,
+                "chunk_index": i if page is not None else chunk_index,
+                "text": chunk
+            })
+            chunk_index += 1
+    return all_chunks, page_count
+
+def diff_chunks(old_rows, new_chunks, key):
+    """Gespeicherte Chunks (id, content, page_number, chunk_id) mit neuen Chunks abgleichen.
+    
+    key(text) liefert den Inhalts-Hash. Gleiche Inhalte werden in Lesereihenfolge
+    einander zugeordnet; Treffer an anderer Position gelten als verschoben.
+    Gibt (unverändert, verschoben [(id, chunk_index, seite)], neu [chunk], entfernt [id]) zurück.
+    """
+    by_hash = collections.defaultdict(collections.deque)
+    for row in sorted(old_rows, key=lambda r: (r['page_number'], r['chunk_id'], r['id'])):
+        by_hash[key(row['content'])].append(row)
+
+    unchanged, moved, added = 0, [], []
+    for chunk in new_chunks:
+        candidates = by_hash.get(key(chunk['text']))
+        if not candidates:
+            added.append(chunk)
+            continue
+        row = candidates.popleft()
+        page = chunk['page'] or 0
+        if row['chunk_id'] == chunk['chunk_index'] and row['page_number'] == page:
+            unchanged += 1
+        else:
+            moved.append((row['id'], chunk['chunk_index'], page))
+
+    removed = [row['id'] for rows in by_hash.values() for row in rows]
+    return unchanged, moved, added, removed
+
+def create_extract_pool(processes: int):
+    """Prozess-Pool für die PDF-Extraktion (spawn: kein fork des Torch-Prozesses)"""
+    if processes <= 0:
+        return None
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+#----------------------------------------
+# Pipeline: extract -> chunk -> embed (Batches) -> insert
+#----------------------------------------
+
+_DONE = object()
+
+async def run_pipeline(path: str, filename: str, encode, write_batch, job=None,
+                       chunking: dict = None, embed_batch_size: int = 64, queue_size: int = 4,
+                       before_embed=None, extract_pool=None, shard_pages: int = 16, timer=None):
+    """Verarbeitet eine Datei in überlappenden Stufen mit begrenzten Queues.
+
+    Extraktion und Chunking laufen in einem Thread (mit extract_pool verteilt
+    auf mehrere Prozesse), Embedding und Schreiben als Coroutinen. Zwischen den Stufen liegen höchstens queue_size Einträge,
+    der Speicherbedarf hängt also nicht von der Buchgröße ab (Ausnahme: python-docx
+    hält das XML eines Word-Dokuments vollständig im Speicher).
+
+    encode(texts) liefert die Embeddings, write_batch(chunks) schreibt einen
+    Batch mit Embeddings, before_embed() wird vor jedem Batch abgewartet.
+    Mit timer (metrics.StageTimer) werden die Arbeitszeiten je Stufe summiert,
+    ohne das Warten auf volle Queues. Gibt (seitenzahl, anzahl_chunks) zurück.
+    """
+    loop = asyncio.get_running_loop()
+    chunk_queue = asyncio.Queue(maxsize=queue_size)
+    insert_queue = asyncio.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    totals = {"pages": 0, "chunks": 0, "blocked": 0.0}
+
+    def timed(stage, started):
+        if timer:
+            timer.add(stage, time.perf_counter() - started)
+
+    def put_from_thread(item):
+        # Blockiert den Extraktions-Thread, solange die Queue voll ist
+        started = time.perf_counter()
+        try:
+            _put_from_thread(item)
+        finally:
+            totals["blocked"] += time.perf_counter() - started
+
+    def _put_from_thread(item):
+        # Ein einziges put: ein abgebrochenes und neu gestartetes put könnte den
+        # Batch doppelt einreihen, wenn das erste doch noch durchkommt
+        future = asyncio.run_coroutine_threadsafe(chunk_queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=1)
+                return
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return
+
+    def extract():
+        started = time.perf_counter()
+        try:
+            chunk_index = 0
+            pages = iter_page_chunks(path, filename, chunking=chunking,
+                                     pool=extract_pool, shard_pages=shard_pages)
+            for page, page_chunks, page_count in pages:
+                if stop.is_set():
+                    pages.close()
+                    return
+                totals["pages"] = page_count
+                if job:
+                    job.pages_total = page_count
+                if page_chunks:
+                    chunks = []
+                    for i, chunk in enumerate(page_chunks):
+                        # PDF: Index pro Seite, DOCX: fortlaufend
+                        chunks.append({
+                            "page": page,
+                            "chunk_index": i if page is not None else chunk_index,
+                            "text": chunk
+                        })
+                        chunk_index += 1
+                    put_from_thread(chunks)
+                if job and page is not None:
+                    job.pages_done = page
+            if job:
+                job.pages_done = totals["pages"]
+        finally:
+            put_from_thread(_DONE)
+            if timer:
+                timer.add("extract", time.perf_counter() - started - totals["blocked"])
+
+    async def embed():
+        pending = []
+
+        async def flush():
+            if job and job.stage == "extracting":
+                job.stage = "embedding"
+            if before_embed:
+                started = time.perf_counter()
+                await before_embed()
+                timed("yield", started)
+            started = time.perf_counter()
+            embeddings = await encode([c['text'] for c in pending])
+            timed("embed", started)
+            for chunk, embedding in zip(pending, embeddings):
+                chunk['embedding'] = embedding
+            await insert_queue.put(list(pending))
+            if job:
+                job.chunks_embedded += len(pending)
+            pending.clear()
+
+        while True:
+            chunks = await chunk_queue.get()
+            if chunks is _DONE:
+                break
+            for chunk in chunks:
+                pending.append(chunk)
+                if len(pending) >= embed_batch_size:
+                    await flush()
+        if pending:
+            await flush()
+        await insert_queue.put(_DONE)
+
+    async def insert():
+        while True:
+            batch = await insert_queue.get()
+            if batch is _DONE:
+                break
+            started = time.perf_counter()
+            await write_batch(batch)
+            timed("insert", started)
+            totals["chunks"] += len(batch)
+            if job:
+                job.chunks_inserted += len(batch)
+
+    tasks = [
+        asyncio.ensure_future(asyncio.to_thread(extract)),
+        asyncio.ensure_future(embed()),
+        asyncio.ensure_future(insert()),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return totals["pages"], totals["chunks"]
+
+#----------------------------------------
+# Komplettverarbeitung im Speicher (Skripte, kleine Dateien)
+#----------------------------------------
+
+def extract_text_from_pdf(pdf_bytes: bytes) -> str:
+    """Extrahiert Text aus einem PDF mit PyMuPDF"""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    text = ""
+    for page_num, page in enumerate(doc):
+        page_text = page.get_text()
+        text += f"\n--- Seite {page_num + 1} ---\n{page_text}"
+    return text, len(doc)
+
+def chunk_pdf_with_metadata(pdf_bytes, chunk_size=100, chunking=None):
+    chunking = chunking or {"chunk_size": chunk_size}
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    all_chunks = []
+
+    for page_num, page in enumerate(doc):
+        text = page.get_text()
+        if not text.strip():
+            continue
+
+        chunks = chunk_text(text, **chunking)
+        for i, chunk in enumerate(chunks):
+            all_chunks.append({
+                "page": page_num + 1,
+                "chunk_index": i,
+                "text": chunk
+            })
+
+    return all_chunks, len(doc)
+
+#----------------------------------------
+
+def extract_text_from_docx(docx_bytes: bytes) -> str:
+    doc = Document(docx_bytes)
+    return "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+
+def chunk_docx_with_metadata(docx_bytes, chunk_size=100, chunking=None):
+    chunking = chunking or {"chunk_size": chunk_size}
+    text = extract_text_from_docx(docx_bytes)
+    chunks = chunk_text(text, **chunking)
+    all_chunks = []
+    for i, chunk in enumerate(chunks):
+        all_chunks.append({
+            "page": None,  # Word hat keine Seiten
+            "chunk_index": i,
+            "text": chunk
+        })
+    estimated_pages = max(1, len(text.split()) // 500)
+    return all_chunks, estimated_pages
+
+#----------------------------------------
+
+def extract_text_from_txt(txt_bytes: bytes) -> str:
+    return txt_bytes.decode("utf-8")
+
+def chunk_txt_with_metadata(txt_bytes, chunk_size=100, chunking=None):
+    chunking = chunking or {"chunk_size": chunk_size}
+    text = extract_text_from_txt(txt_bytes)
+    # Absätze erkennen
+    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+    all_chunks = []
+    chunk_index = 0
+
+    for para in paragraphs:
+        chunks = chunk_text(para, **chunking)
+        for chunk in chunks:
+            all_chunks.append({
+                "page": None,
+                "chunk_index": chunk_index,
+                "text": chunk
+            })
+            chunk_index += 1
+
+    estimated_pages = max(1, len(text.split()) // 500)
+    return all_chunks, estimated_pages
@@ -0,0 +1,157 @@
+"""
+Hintergrund-Jobs für die Buch-Verarbeitung (Ingestion)
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Zu viele Jobs warten bereits"""
+
+
+class BookConflict(Exception):
+    """Buch existiert bereits oder wurde während der Verarbeitung gelöscht"""
+
+
+class IngestionJob:
+    """Status eines Upload-Jobs, wird von /jobs/{id} ausgeliefert"""
+
+    def __init__(self, book_id: str, filename: str, path: str, kind: str = "upload"):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind  # upload (neues Buch) oder update (PUT /books/{book_id})
+        self.book_id = book_id
+        self.filename = filename
+        self.path = path
+        self.status = "queued"  # queued, running, done, failed
+        # queued, extracting, [diffing,] embedding (Pipeline läuft), finalizing, done
+        self.stage = "queued"
+        self.pages_total = None
+        self.pages_done = 0
+        self.chunks_total = None
+        self.chunks_embedded = 0
+        self.chunks_cached = 0  # davon aus dem Embedding-Speicher
+        self.chunks_inserted = 0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "book_id": self.book_id,
+            "kind": self.kind,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "pages_total": self.pages_total,
+            "pages_done": self.pages_done,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_cached": self.chunks_cached,
+            "chunks_inserted": self.chunks_inserted,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": round((self.finished_at or time.time()) - self.started_at, 2)
+                                if self.started_at else None,
+        }
+
+
+class JobQueue:
+    """Begrenzte Warteschlange mit einer festen Anzahl Worker.
+
+    handler(job) wird pro Job aufgerufen und wirft bei Fehlern; das Ergebnis
+    landet in job.result. Abgeschlossene Jobs bleiben für Statusabfragen
+    erhalten, die ältesten werden ab max_finished verworfen.
+    """
+
+    def __init__(self, handler, workers: int = 1, max_queued: int = 100, max_finished: int = 500):
+        self.handler = handler
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._queue = asyncio.Queue()
+        self._jobs = OrderedDict()
+        self._tasks = []
+
+    def start(self):
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(i)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job: IngestionJob) -> IngestionJob:
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFull(f"{self._queue.qsize()} Jobs in der Warteschlange")
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        self._trim()
+        return job
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        return list(self._jobs.values())
+
+    def active_for_book(self, book_id: str):
+        """Laufender oder wartender Job für dieses Buch (oder None)"""
+        for job in self._jobs.values():
+            if job.book_id == book_id and not job.finished:
+                return job
+        return None
+
+    def stats(self):
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "max_queued": self.max_queued,
+            "jobs": counts,
+        }
+
+    async def _worker(self, number: int):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await self.handler(job)
+                job.status = "done"
+                job.stage = "done"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "Abgebrochen"
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.job_id} ({job.book_id}) fehlgeschlagen: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
@@ -0,0 +1,163 @@
+"""
+Gepoolter Ollama-Client mit Parallelitätslimit und Warteschlange
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+from metrics import LLM_QUEUE_WAIT_SECONDS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+class LLMOverloaded(Exception):
+    """Alle Generierungs-Slots belegt und Warteschlange voll"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM ausgelastet, erneut versuchen in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMError(Exception):
+    """Ollama hat mit einem Fehler geantwortet"""
+
+
+class OllamaClient:
+    """Ein langlebiger httpx-Client für alle Generierungen.
+
+    max_concurrency Generierungen laufen gleichzeitig, max_queue weitere
+    dürfen warten. Darüber hinaus wird sofort LLMOverloaded geworfen, mit
+    einer Retry-After-Schätzung aus der mittleren Generierungsdauer.
+    """
+
+    def __init__(self, base_url: str, model: str, max_concurrency: int = 2,
+                 max_queue: int = 16, timeout: float = 180.0):
+        self.base_url = base_url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_concurrency + 4,
+                max_keepalive_connections=max_concurrency + 4
+            )
+        )
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._waiting = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._avg_duration = 10.0  # gleitender Mittelwert in Sekunden
+
+    def retry_after(self) -> int:
+        backlog = (self._waiting + self._active + 1) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._avg_duration))
+
+    def check_capacity(self):
+        """Wirft LLMOverloaded, wenn eine neue Anfrage nicht mehr warten dürfte"""
+        if self._active >= self.max_concurrency and self._waiting >= self.max_queue:
+            self._rejected += 1
+            raise LLMOverloaded(self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self):
+        self.check_capacity()
+        self._waiting += 1
+        queued_at = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        LLM_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued_at)
+
+        self._active += 1
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self._active -= 1
+            self._slots.release()
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+                duration = time.perf_counter() - started
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+    async def generate(self, prompt: str, **options) -> dict:
+        """Komplette Antwort (stream=False); liefert das Ollama-JSON"""
+        async with self.slot():
+            response = await self._client.post(
+                "/api/generate",
+                json={"model": self.model, "prompt": prompt, "stream": False, **options}
+            )
+            if response.status_code != 200:
+                raise LLMError(f"Ollama {response.status_code}: {response.text[:500]}")
+            data = response.json()
+            self._record_tokens(data)
+            return data
+
+    @asynccontextmanager
+    async def stream_generate(self, prompt: str, **options):
+        """Token-Stream; liefert einen async Iterator über die Ollama-JSON-Zeilen.
+
+        Beim Verlassen des Kontexts wird die Verbindung geschlossen, auch
+        mitten in der Generierung - Ollama bricht dann ab.
+        """
+        async with self.slot():
+            async with self._client.stream(
+                "POST",
+                "/api/generate",
+                json={"model": self.model, "prompt": prompt, "stream": True, **options}
+            ) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise LLMError(f"Ollama {response.status_code}: {body[:500]!r}")
+                yield self._iter_lines(response)
+
+    async def _iter_lines(self, response):
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("done"):
+                self._record_tokens(data)
+            yield data
+            if data.get("done"):
+                return
+
+    @staticmethod
+    def _record_tokens(data: dict):
+        # Ollama meldet die Tokenzahlen in der letzten Antwort (done=true)
+        if "prompt_eval_count" in data:
+            LLM_TOKENS.observe(data["prompt_eval_count"], kind="prompt")
+        if "eval_count" in data:
+            LLM_TOKENS.observe(data["eval_count"], kind="completion")
+
+    def stats(self):
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self._active,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_duration_seconds": round(self._avg_duration, 2),
+        }
+
+    async def close(self):
+        await self._client.aclose()
@@ -0,0 +1,232 @@
+"""
+Prometheus-Metriken ohne zusätzliche Abhängigkeit (Textformat 0.0.4) und Zeitmessung pro Stufe
+"""
+
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+# Sekunden: 1 ms bis 2 min (LLM-Generierungen auf der CPU dauern lange)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: Labels {self.labelnames} erwartet, nicht {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key) -> dict:
+        return dict(zip(self.labelnames, key))
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self._samples()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Wert wird beim Abruf über callback() gelesen: Zahl oder [(labels, wert), ...]"""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), callback=None):
+        super().__init__(name, help, labelnames)
+        self.callback = callback
+
+    def _samples(self):
+        values = self.callback() if self.callback else None
+        if values is None:
+            return
+        if not isinstance(values, (list, tuple)):
+            values = [({}, values)]
+        for labels, value in values:
+            self._key(labels)
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series = {}  # key -> [zähler je bucket, summe, anzahl]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def _samples(self):
+        for key, (counts, total, count) in sorted(self._series.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {count}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrik '{metric.name}' ist bereits registriert")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), callback=None):
+        return self._add(Gauge(name, help, labelnames, callback))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_seconds", "Dauer einzelner Verarbeitungsstufen", ("endpoint", "stage"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "rag_request_seconds", "Gesamtdauer der Anfrage bzw. des Upload-Jobs (status: HTTP-Status oder done)",
+    ("endpoint", "status"))
+DB_POOL_WAIT_SECONDS = REGISTRY.histogram(
+    "rag_db_pool_wait_seconds", "Wartezeit auf eine Verbindung aus dem DB-Pool")
+EMBED_BATCH_SIZE = REGISTRY.histogram(
+    "rag_embed_batch_size", "Texte pro encode-Aufruf", ("executor",), buckets=SIZE_BUCKETS)
+EMBED_SECONDS = REGISTRY.histogram(
+    "rag_embed_seconds", "Dauer eines encode-Aufrufs (inkl. Warten auf einen Worker)", ("executor",))
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "rag_llm_queue_wait_seconds", "Wartezeit auf einen freien Generierungs-Slot")
+LLM_TOKENS = REGISTRY.histogram(
+    "rag_llm_tokens", "Tokens pro Generierung laut Ollama", ("kind",), buckets=TOKEN_BUCKETS)
+COALESCED_REQUESTS = REGISTRY.counter(
+    "rag_coalesced_requests_total", "Anfragen, die an eine laufende identische Generierung angehängt wurden",
+    ("endpoint",))
+
+
+class StageTimer:
+    """Misst die Stufen einer Anfrage; finish() schreibt sie in die Histogramme.
+
+    Mehrfach gemessene Stufen werden aufsummiert (z.B. embed über alle
+    Batches eines Uploads), auch aus anderen Threads.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.finished = False
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def finish(self, status: str = "200"):
+        """Einmal pro Anfrage; weitere Aufrufe werden ignoriert"""
+        if self.finished:
+            return
+        self.finished = True
+        for stage, seconds in self.stages.items():
+            STAGE_SECONDS.observe(seconds, endpoint=self.endpoint, stage=stage)
+        REQUEST_SECONDS.observe(time.perf_counter() - self.started, endpoint=self.endpoint, status=status)
+
+    def as_dict(self):
+        """Stufen in Millisekunden (für Antworten und Logs)"""
+        timings = {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}
+        timings["total"] = round((time.perf_counter() - self.started) * 1000, 1)
+        return timings
+
+    def server_timing(self) -> str:
+        """Wert für den Server-Timing-Header"""
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.as_dict().items())
+
+
+class TimedPool:
+    """Hülle um den asyncpg-Pool, die die Wartezeit von acquire() misst"""
+
+    def __init__(self, pool):
+        self._pool = pool
+
+    @asynccontextmanager
+    async def acquire(self):
+        start = time.perf_counter()
+        async with self._pool.acquire() as conn:
+            DB_POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+            yield conn
+
+    def in_use(self) -> int:
+        return self._pool.get_size() - self._pool.get_idle_size()
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
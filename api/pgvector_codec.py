@@ -0,0 +1,45 @@
+"""
+Binärer asyncpg-Codec für den pgvector-Typ vector
+"""
+
+import struct
+
+import numpy as np
+
+# pgvector Binärformat: uint16 Dimension, uint16 unbenutzt, dann float32 (big endian)
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+
+def encode_vector(value) -> bytes:
+    """NumPy-Array (oder Liste) direkt in den Sendepuffer schreiben.
+
+    Die Werte werden genau einmal kopiert - beim Umwandeln in big endian
+    direkt an ihre Zielposition im Puffer.
+    """
+    values = np.asarray(value)
+    if values.ndim != 1:
+        raise ValueError(f"vector erwartet ein 1D-Array, nicht {values.shape}")
+
+    dim = values.shape[0]
+    buf = bytearray(_HEADER.size + dim * _WIRE_DTYPE.itemsize)
+    _HEADER.pack_into(buf, 0, dim, 0)
+    np.frombuffer(buf, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size)[:] = values
+    return buf
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Liefert eine schreibgeschützte float32-Sicht auf den Empfangspuffer (ohne Kopie)"""
+    dim, _ = _HEADER.unpack_from(data)
+    return np.frombuffer(data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size)
+
+
+async def register_vector_codec(conn):
+    """Als init= an asyncpg.create_pool übergeben, läuft für jede neue Verbindung"""
+    await conn.set_type_codec(
+        "vector",
+        schema="public",
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary"
+    )
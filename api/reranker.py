@@ -0,0 +1,86 @@
+"""
+Reranking der Kandidaten mit einem kleinen Cross-Encoder auf der CPU
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Mehrsprachig (auf mMARCO trainiert), die Bücher und Fragen sind überwiegend deutsch;
+# die englischen ms-marco-Modelle sind nur auf englischen Paaren trainiert
+DEFAULT_RERANK_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+
+class Reranker:
+    """Bewertet (Frage, Chunk)-Paare in einem gebündelten predict-Aufruf.
+
+    Das Modell wird beim ersten Aufruf geladen (oder vorab mit load()). Die
+    Berechnung läuft in einem eigenen Thread, damit sie weder den Event-Loop
+    noch die Embedding-Threads blockiert.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, batch_size: int = 32):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self._load_lock = asyncio.Lock()
+        self._calls = 0
+        self._pairs = 0
+        self._total_ms = 0.0
+
+    async def load(self):
+        async with self._load_lock:
+            if self._model is None:
+                loop = asyncio.get_running_loop()
+                self._model = await loop.run_in_executor(self._pool, self._load_model)
+                logger.info(f"Reranker geladen: {self.model_name}")
+        return self._model
+
+    def _load_model(self):
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(self.model_name, device="cpu")
+
+    async def rerank(self, question: str, candidates, top_k: int):
+        """Kandidaten (dicts mit 'content') neu sortieren, die besten top_k zurückgeben.
+
+        Liefert (ergebnisse, dauer_ms); jedes Ergebnis bekommt 'rerank_score'.
+        """
+        if not candidates:
+            return [], 0.0
+
+        model = await self.load()
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pairs = [(question, candidate['content']) for candidate in candidates]
+        scores = await loop.run_in_executor(
+            self._pool,
+            lambda: model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        )
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        self._calls += 1
+        self._pairs += len(pairs)
+        self._total_ms += duration_ms
+
+        ranked = sorted(
+            ({**candidate, "rerank_score": float(score)} for candidate, score in zip(candidates, scores)),
+            key=lambda candidate: candidate["rerank_score"],
+            reverse=True
+        )
+        return ranked[:top_k], duration_ms
+
+    def stats(self):
+        return {
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "calls": self._calls,
+            "pairs": self._pairs,
+            "avg_ms": round(self._total_ms / self._calls, 1) if self._calls else 0,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
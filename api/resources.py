@@ -0,0 +1,62 @@
+"""
+Modelle und NLTK-Daten aus dem Image laden (offline), Startphasen messen
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Im Image vorab gespeicherte Modelle: MODEL_DIR/<letzter Teil des Modellnamens>
+MODEL_DIR = os.getenv("MODEL_DIR", "/models")
+# Fehlende NLTK-Daten nachladen? Im Image aus, dort sind sie eingebaut
+NLTK_DOWNLOAD = os.getenv("NLTK_DOWNLOAD", "true").lower() == "true"
+
+PUNKT_RESOURCES = ("punkt_tab", "punkt")
+
+
+def resolve_model(name: str) -> str:
+    """Lokalen Pfad des Modells liefern, falls im Image vorhanden, sonst den Hub-Namen"""
+    if os.path.isdir(name):
+        return name
+    local = os.path.join(MODEL_DIR, name.rstrip("/").split("/")[-1])
+    return local if os.path.isdir(local) else name
+
+
+@lru_cache(maxsize=None)
+def ensure_punkt():
+    """Satz-Tokenizer-Daten prüfen (einmal pro Prozess), erst beim ersten Chunking"""
+    import nltk
+
+    for resource in PUNKT_RESOURCES:
+        try:
+            nltk.data.find(f"tokenizers/{resource}")
+        except LookupError:
+            if not NLTK_DOWNLOAD:
+                raise LookupError(f"NLTK-Daten '{resource}' fehlen (NLTK_DATA prüfen oder NLTK_DOWNLOAD=true)")
+            logger.info(f"Lade NLTK-Daten '{resource}'")
+            nltk.download(resource, quiet=True)
+
+
+class StartupTimer:
+    """Dauer der einzelnen Startphasen loggen und für /ready festhalten"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.phases[name] = round(duration_ms, 1)
+            logger.info(f"Startphase '{name}': {duration_ms:.0f} ms")
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
@@ -0,0 +1,180 @@
+"""
+Suche in den Chunks eines Buchs: Vektor, Volltext und hybrid (Reciprocal Rank Fusion)
+"""
+
+import numpy as np
+
+from vector_index import coarse_distance
+
+SEARCH_MODES = ("vector", "hybrid")
+
+# Konstante k der Reciprocal Rank Fusion (Cormack et al.: 60)
+DEFAULT_RRF_K = 60
+
+# Kompakte Speicherung: so viele Kandidaten pro Treffer werden exakt nachbewertet
+DEFAULT_RESCORE_FACTOR = 4
+
+
+def with_neighbors(search_sql: str, book_id: str, window: str, order_by: str) -> str:
+    """Treffer um die Nachbar-Chunks (chunk_id ± window, gleiche Seite) ergänzen.
+
+    Die Nachbarn kommen als Arrays neighbor_ids/neighbor_contents in derselben
+    Abfrage mit. order_by (über die Spalten der Suche als s.*) legt die
+    Rangfolge fest; die Ausgabereihenfolge einer Unterabfrage garantiert
+    Postgres nicht.
+    """
+    return f"""
+        SELECT h.*, nb.neighbor_ids, nb.neighbor_contents
+        FROM (SELECT s.*, row_number() OVER (ORDER BY {order_by}) AS position FROM ({search_sql}) s) h
+        LEFT JOIN LATERAL (
+            SELECT array_agg(n.chunk_id ORDER BY n.chunk_id) AS neighbor_ids,
+                   array_agg(n.content ORDER BY n.chunk_id) AS neighbor_contents
+            FROM book_chunks n
+            WHERE n.book_id = {book_id}
+              AND n.page_number IS NOT DISTINCT FROM h.page_number
+              AND n.chunk_id BETWEEN h.chunk_id - {window} AND h.chunk_id + {window}
+              AND n.chunk_id <> h.chunk_id
+        ) nb ON TRUE
+        ORDER BY h.position
+    """
+
+
+def nearest_sql(storage: str, query: str, where: str, limit: str, candidates: str) -> str:
+    """Unterabfrage mit den nächsten Chunks (id, Inhalt, Embedding, exakte distance), nächste zuerst.
+
+    Bei storage="vector" sucht der Index direkt auf den float32-Vektoren. Bei
+    halfvec/bit liefert der kompakte Index `candidates` Zeilen, die dann mit
+    den float32-Vektoren aus der Tabelle neu sortiert werden.
+    """
+    exact = f"c.embedding <=> {query}"
+    if storage == "vector":
+        return f"""
+            SELECT c.id, c.book_id, c.content, c.page_number, c.chunk_id, c.embedding, {exact} AS distance
+            FROM book_chunks c
+            WHERE {where}
+            ORDER BY {exact}
+            LIMIT {limit}"""
+    return f"""
+            SELECT c.id, c.book_id, c.content, c.page_number, c.chunk_id, c.embedding, {exact} AS distance
+            FROM (
+                SELECT id, book_id, content, page_number, chunk_id, embedding
+                FROM book_chunks c
+                WHERE {where}
+                ORDER BY {coarse_distance(storage, "c.embedding", query)}
+                LIMIT {candidates}
+            ) c
+            ORDER BY {exact}
+            LIMIT {limit}"""
+
+
+async def vector_search(conn, embedding, book_id: str, limit: int,
+                        storage: str = "vector", rescore_factor: int = DEFAULT_RESCORE_FACTOR,
+                        neighbors: int = 0):
+    """Nächste Nachbarn nach Kosinus-Distanz (neighbors > 0: mit Nachbar-Chunks)"""
+    args = [embedding, book_id, limit]
+    if storage == "vector":
+        sql = """
+            SELECT content, page_number, chunk_id, embedding,
+                   1 - (embedding <=> $1::vector) as similarity
+            FROM book_chunks
+            WHERE book_id = $2
+            ORDER BY embedding <=> $1::vector
+            LIMIT $3
+        """
+    else:
+        nearest = nearest_sql(storage, "$1::vector", "c.book_id = $2", "$3", "$4")
+        sql = f"""
+            SELECT content, page_number, chunk_id, embedding, 1 - distance AS similarity
+            FROM ({nearest}) n
+            ORDER BY distance
+        """
+        args.append(limit * rescore_factor)
+
+    if neighbors:
+        args.append(neighbors)
+        sql = with_neighbors(sql, "$2", f"${len(args)}", "s.similarity DESC")
+    return await conn.fetch(sql, *args)
+
+
+async def hybrid_search(conn, embedding, question: str, book_id: str, limit: int,
+                        candidates: int = None, rrf_k: int = DEFAULT_RRF_K,
+                        storage: str = "vector", rescore_factor: int = DEFAULT_RESCORE_FACTOR,
+                        neighbors: int = 0):
+    """Vektor- und Volltextsuche in einer Abfrage, kombiniert per RRF.
+
+    Beide Listen liefern je `candidates` Treffer; der Score ist
+    1/(rrf_k + rang_vektor) + 1/(rrf_k + rang_volltext). Die Volltextsuche
+    verknüpft die Wörter der Frage mit ODER und rankt mit ts_rank_cd, damit
+    exakte Namen und Begriffe gefunden werden, die das (englische)
+    Embedding-Modell nicht trifft.
+    """
+    candidates = max(candidates or limit * 4, limit)
+    nearest = nearest_sql(storage, "$1::vector", "c.book_id = $2", "$4", "$7")
+    # $7 kommt nur bei kompakter Speicherung im SQL vor
+    args = [embedding, book_id, question, candidates, rrf_k, limit]
+    if storage != "vector":
+        args.append(candidates * rescore_factor)
+    sql = f"""
+        WITH vector AS (
+            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+            FROM ({nearest}) v
+        ),
+        query AS (
+            SELECT replace(plainto_tsquery('german', $3)::text, '&', '|')::tsquery AS q
+        ),
+        lexical AS (
+            SELECT id, row_number() OVER (ORDER BY score DESC) AS rank
+            FROM (
+                SELECT c.id, ts_rank_cd(c.content_tsv, query.q) AS score
+                FROM book_chunks c, query
+                WHERE c.book_id = $2 AND c.content_tsv @@ query.q
+                ORDER BY score DESC
+                LIMIT $4
+            ) l
+        )
+        SELECT c.content, c.page_number, c.chunk_id, c.embedding,
+               1 - (c.embedding <=> $1::vector) AS similarity,
+               COALESCE(1.0 / ($5 + v.rank), 0) + COALESCE(1.0 / ($5 + l.rank), 0) AS rrf_score,
+               v.rank AS vector_rank,
+               l.rank AS lexical_rank
+        FROM vector v
+        FULL OUTER JOIN lexical l ON l.id = v.id
+        JOIN book_chunks c ON c.id = COALESCE(v.id, l.id)
+        ORDER BY rrf_score DESC
+        LIMIT $6
+    """
+    if neighbors:
+        args.append(neighbors)
+        sql = with_neighbors(sql, "$2", f"${len(args)}", "s.rrf_score DESC, s.similarity DESC")
+    return await conn.fetch(sql, *args)
+
+
+async def batch_vector_search(conn, embeddings, book_ids, limits,
+                              storage: str = "vector", rescore_factor: int = DEFAULT_RESCORE_FACTOR):
+    """Top-k für viele (Frage, Buch)-Paare in einer Abfrage.
+
+    Die Embeddings gehen als ein flaches real[] hinüber und werden je Zeile
+    per Slice wieder zu einem vector; LATERAL nutzt pro Frage den Index wie
+    vector_search. Gibt {index: [zeilen]} in Eingabereihenfolge zurück.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    count, dim = matrix.shape
+    nearest = nearest_sql(storage, "q.embedding", "c.book_id = q.book_id", "q.k", "q.k * $6")
+    extra = [] if storage == "vector" else [rescore_factor]
+    rows = await conn.fetch(f"""
+        WITH q AS (
+            SELECT idx, book_id, k,
+                   ($1::real[])[(idx * $5 + 1):(idx * $5 + $5)]::vector AS embedding
+            FROM unnest($2::int[], $3::text[], $4::int[]) AS t(idx, book_id, k)
+        )
+        SELECT q.idx, r.content, r.page_number, r.chunk_id, r.embedding,
+               1 - r.distance AS similarity
+        FROM q
+        CROSS JOIN LATERAL ({nearest}) r
+        ORDER BY q.idx, r.distance
+    """, matrix.ravel().tolist(), list(range(count)), list(book_ids), list(limits), dim, *extra)
+
+    results = {i: [] for i in range(count)}
+    for row in rows:
+        results[row['idx']].append(row)
+    return results
@@ -0,0 +1,88 @@
+"""
+Schema-Erweiterungen für bestehende Datenbanken
+
+init-db.sql legt neue Datenbanken vollständig an. Ältere Installationen werden
+beim Start nur mit schnellen, idempotenten Statements nachgezogen (neue
+Tabellen). Migrationen, die book_chunks umschreiben oder über alle Chunks
+indizieren, laufen nicht beim Start: sie halten Sperren, bis die ganze Tabelle
+verarbeitet ist, und würden den Start samt /health blockieren. Der Start meldet
+sie als ausstehend; ausgeführt werden sie mit scripts/migrate-schema.py.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Beim Start: billig und ohne Sperren auf book_chunks
+STARTUP_STATEMENTS = [
+    # Inhaltsadressierte Embeddings (sha256 aus Modellname + normalisiertem Text)
+    """
+    CREATE TABLE IF NOT EXISTS embedding_store (
+        content_hash BYTEA PRIMARY KEY,
+        model VARCHAR(200) NOT NULL,
+        embedding vector(384) NOT NULL,
+        created_at TIMESTAMP DEFAULT NOW()
+    )
+    """,
+]
+
+
+def _index(name: str, definition: str):
+    """Index-Migration: gilt erst mit gültigem Index als angewendet; Reste eines
+    abgebrochenen CONCURRENTLY-Aufbaus werden vorher entfernt"""
+    return (
+        name,
+        f"SELECT COALESCE((SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('{name}')), false)",
+        [f"DROP INDEX CONCURRENTLY IF EXISTS {name}",
+         f"CREATE INDEX CONCURRENTLY {name} ON {definition}"],
+    )
+
+
+# (Name, Prüfung ob schon angewendet, Statements) - nur über scripts/migrate-schema.py
+MIGRATIONS = [
+    # Volltextsuche (deutsch) für die hybride Suche; wird beim INSERT/COPY berechnet.
+    # Schreibt book_chunks komplett um (ACCESS EXCLUSIVE bis zum Ende)
+    (
+        "content_tsv",
+        """
+        SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'book_chunks' AND column_name = 'content_tsv')
+        """,
+        ["""
+        ALTER TABLE book_chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('german', content)) STORED
+        """],
+    ),
+    _index("book_chunks_content_tsv_idx", "book_chunks USING gin (content_tsv)"),
+    # Nachbar-Chunks (chunk_id ± n) für den Kontext ohne Scan über das ganze Buch
+    _index("book_chunks_book_chunk_idx", "book_chunks (book_id, chunk_id)"),
+]
+
+
+async def ensure_schema(conn):
+    """Schnelle Schema-Ergänzungen ausführen; gibt die Namen ausstehender Migrationen zurück"""
+    for statement in STARTUP_STATEMENTS:
+        await conn.execute(statement)
+    pending = await pending_migrations(conn)
+    if pending:
+        logger.warning(f"Ausstehende Schema-Migrationen: {', '.join(pending)} - "
+                       f"mit scripts/migrate-schema.py ausführen (schreibt book_chunks um)")
+    else:
+        logger.info("Schema aktuell")
+    return pending
+
+
+async def pending_migrations(conn):
+    return [name for name, applied, _ in MIGRATIONS if not await conn.fetchval(applied)]
+
+
+async def run_migrations(conn):
+    """Ausstehende Migrationen nacheinander ausführen (nicht in einer Transaktion, wegen CONCURRENTLY)"""
+    pending = await pending_migrations(conn)
+    for name, _, statements in MIGRATIONS:
+        if name not in pending:
+            continue
+        logger.info(f"Migration {name} ...")
+        for statement in statements:
+            await conn.execute(statement)
+    return pending
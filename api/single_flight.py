@@ -0,0 +1,112 @@
+"""
+Gleiche laufende Anfragen zusammenfassen (Single-Flight)
+
+Stellen viele Clients kurz nacheinander dieselbe Frage, läuft nur eine
+Generierung. Sie läuft als eigener Task, unabhängig von den Clients; alle
+Abonnenten lesen ihre Events von Anfang an mit (späte bekommen die bisherigen
+nachgeliefert). Trennt sich ein Client, endet nur sein Abonnement - erst wenn
+keiner mehr zuhört, wird die Generierung abgebrochen.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Flight:
+    """Eine laufende Arbeit mit ihren bisherigen Events"""
+
+    def __init__(self, key):
+        self.key = key
+        self.events = []
+        self.finished = False
+        self.error = None
+        self.subscribers = 0
+        self.task = None
+        self._wakeup = asyncio.Event()
+
+    def publish(self, event):
+        self.events.append(event)
+        self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def _finish(self, error: BaseException = None):
+        self.finished = True
+        self.error = error
+        self._wakeup.set()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._started = 0
+        self._coalesced = 0
+        self._cancelled = 0
+
+    def join(self, key, produce):
+        """Laufende Arbeit zu key abonnieren oder mit produce(publish) starten.
+
+        Gibt (Events als async Iterator, True wenn die Arbeit neu gestartet
+        wurde) zurück. Ein Fehler von produce wird nach den bis dahin
+        veröffentlichten Events bei jedem Abonnenten geworfen.
+        """
+        flight = self._flights.get(key)
+        created = flight is None
+        if created:
+            flight = self._flights[key] = Flight(key)
+            flight.task = asyncio.create_task(self._run(flight, produce))
+            self._started += 1
+        else:
+            self._coalesced += 1
+        # Schon hier zählen, damit der Abbruch eines anderen Abonnenten die
+        # Arbeit nicht beendet, bevor dieser mit dem Lesen begonnen hat
+        flight.subscribers += 1
+        return self._subscribe(flight), created
+
+    async def _run(self, flight: Flight, produce):
+        try:
+            await produce(flight.publish)
+        except asyncio.CancelledError as e:
+            flight._finish(e)
+            raise
+        except Exception as e:
+            flight._finish(e)
+        else:
+            flight._finish()
+        finally:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    async def _subscribe(self, flight: Flight):
+        position = 0
+        try:
+            while True:
+                wakeup = flight._wakeup
+                if position < len(flight.events):
+                    yield flight.events[position]
+                    position += 1
+                    continue
+                if flight.finished:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                await wakeup.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.finished:
+                # Letzter Abonnent weg: Arbeit abbrechen, neue Anfragen starten frisch
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+                flight.task.cancel()
+                self._cancelled += 1
+                logger.info("Keine Abonnenten mehr, gemeinsame Generierung abgebrochen")
+
+    def stats(self):
+        return {
+            "in_flight": len(self._flights),
+            "subscribers": sum(flight.subscribers for flight in self._flights.values()),
+            "started": self._started,
+            "coalesced": self._coalesced,
+            "cancelled": self._cancelled,
+        }
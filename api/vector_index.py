@@ -0,0 +1,209 @@
+"""
+Verwaltung der ANN-Indizes (HNSW / IVFFlat) auf book_chunks.embedding
+
+Hinweis: pgvector filtert bei einem ANN-Scan erst nach der Kandidatensuche.
+Liegt nur ein kleiner Teil der Bibliothek in einem Buch, kann eine Anfrage mit
+WHERE book_id = ... weniger als LIMIT Treffer liefern. Ab pgvector 0.8 wird
+deshalb iterativ weitergesucht (hnsw.iterative_scan / ivfflat.iterative_scan),
+bis LIMIT Treffer gefunden sind oder hnsw.max_scan_tuples bzw.
+ivfflat.max_probes erreicht ist. Bei älteren Versionen ef_search bzw. probes
+pro Anfrage erhöhen.
+
+Kompakte Speicherung (VECTOR_STORAGE=halfvec oder bit): Der Index enthält
+die Embeddings als halfvec (16 Bit pro Wert) bzw. binär quantisiert (1 Bit),
+berechnet aus der float32-Spalte. Die Spalte bleibt für das exakte Nachbewerten
+der Kandidaten erhalten; im Speicher liegen muss vor allem der Index.
+Benötigt pgvector >= 0.7.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_METHODS = ("hnsw", "ivfflat")
+
+INDEX_NAMES = {
+    "hnsw": "book_chunks_embedding_hnsw_idx",
+    "ivfflat": "book_chunks_embedding_ivfflat_idx",
+}
+
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+
+# Speicherform im Index: Ausdruck über der float32-Spalte, Operatorklasse, Distanzoperator
+STORAGE_TYPES = {
+    "vector": ("{}", "vector_cosine_ops", "<=>"),
+    "halfvec": (f"({{}})::halfvec({EMBEDDING_DIM})", "halfvec_cosine_ops", "<=>"),
+    "bit": (f"binary_quantize({{}})::bit({EMBEDDING_DIM})", "bit_hamming_ops", "<~>"),
+}
+
+MIN_COMPACT_VERSION = (0, 7, 0)
+MIN_ITERATIVE_VERSION = (0, 8, 0)
+
+# Iterative Suche: HNSW kann die Reihenfolge exakt halten (strict_order),
+# IVFFlat kennt nur relaxed_order (Treffer können leicht ungeordnet sein)
+ITERATIVE_SCAN_MODES = ("off", "strict_order", "relaxed_order")
+
+# Parameter für den Aufbau; die Werte sind die pgvector-Defaults
+DEFAULT_BUILD_PARAMS = {
+    "hnsw": {"m": 16, "ef_construction": 64},
+    "ivfflat": {"lists": 100},
+}
+
+# Suchparameter, die pro Transaktion gesetzt werden können
+SEARCH_SETTINGS = {
+    "ef_search": "hnsw.ef_search",
+    "probes": "ivfflat.probes",
+}
+
+
+def index_name(method: str, storage: str = "vector") -> str:
+    if storage == "vector":
+        return INDEX_NAMES[method]
+    return f"book_chunks_embedding_{method}_{storage}_idx"
+
+
+def coarse_distance(storage: str, column: str, query: str) -> str:
+    """Distanz in der Speicherform des Index (muss dem Index-Ausdruck entsprechen)"""
+    expression, _, operator = STORAGE_TYPES[storage]
+    return f"{expression.format(column)} {operator} {expression.format(query)}"
+
+
+def index_ddl(method: str, params: dict, concurrently: bool = True, storage: str = "vector") -> str:
+    if method not in INDEX_METHODS:
+        raise ValueError(f"Unbekannte Index-Methode '{method}'")
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unbekannte Speicherform '{storage}'")
+
+    options = {**DEFAULT_BUILD_PARAMS[method], **{k: v for k, v in params.items() if v is not None}}
+    unknown = set(options) - set(DEFAULT_BUILD_PARAMS[method])
+    if unknown:
+        raise ValueError(f"Ungültige Parameter für {method}: {', '.join(sorted(unknown))}")
+
+    expression, opclass, _ = STORAGE_TYPES[storage]
+    column = "embedding" if storage == "vector" else f"({expression.format('embedding')})"
+    with_clause = ", ".join(f"{key} = {int(value)}" for key, value in options.items())
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {index_name(method, storage)} "
+        f"ON book_chunks USING {method} ({column} {opclass}) WITH ({with_clause})"
+    )
+
+
+async def list_indexes(conn):
+    """Alle ANN-Indizes auf book_chunks mit Größe und Gültigkeit"""
+    rows = await conn.fetch("""
+        SELECT i.relname AS name,
+               am.amname AS method,
+               pg_get_indexdef(i.oid) AS definition,
+               pg_relation_size(i.oid) AS size_bytes,
+               ix.indisvalid AS valid
+        FROM pg_index ix
+        JOIN pg_class i ON i.oid = ix.indexrelid
+        JOIN pg_class t ON t.oid = ix.indrelid
+        JOIN pg_am am ON am.oid = i.relam
+        WHERE t.relname = 'book_chunks' AND am.amname = ANY($1::text[])
+        ORDER BY i.relname
+    """, list(INDEX_METHODS))
+    return [dict(row) for row in rows]
+
+
+async def pgvector_version(conn):
+    version = await conn.fetchval("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    return version, tuple(int(part) for part in version.split("."))
+
+
+async def ensure_storage_support(conn, storage: str):
+    """Für halfvec/bit die pgvector-Extension aktualisieren und die Version prüfen"""
+    if storage not in STORAGE_TYPES:
+        raise ValueError(f"Unbekannte Speicherform '{storage}'")
+    if storage == "vector":
+        return
+    version, parts = await pgvector_version(conn)
+    if parts < MIN_COMPACT_VERSION:
+        logger.info(f"Aktualisiere pgvector {version} für Speicherform '{storage}'")
+        await conn.execute("ALTER EXTENSION vector UPDATE")
+        version, parts = await pgvector_version(conn)
+    if parts < MIN_COMPACT_VERSION:
+        raise RuntimeError(f"Speicherform '{storage}' braucht pgvector >= 0.7, installiert ist {version}")
+
+
+async def build_index(conn, method: str, params: dict = None, rebuild: bool = False, storage: str = "vector"):
+    """Index anlegen oder (rebuild=True) mit neuen Parametern neu aufbauen.
+
+    Läuft mit CONCURRENTLY, blockiert also keine Schreibzugriffe. Darf nicht
+    innerhalb einer Transaktion aufgerufen werden. Ein kompakter Index
+    (storage=halfvec/bit) wird aus den vorhandenen Embeddings aller Bücher
+    berechnet, die Tabelle selbst bleibt unverändert.
+    """
+    ddl = index_ddl(method, params or {}, storage=storage)
+    name = index_name(method, storage)
+
+    if rebuild:
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    else:
+        # Ungültige Reste eines abgebrochenen CONCURRENTLY-Builds entfernen
+        valid = await conn.fetchval("""
+            SELECT ix.indisvalid FROM pg_index ix
+            JOIN pg_class i ON i.oid = ix.indexrelid
+            WHERE i.relname = $1
+        """, name)
+        if valid is False:
+            logger.warning(f"Ungültiger Index {name} wird neu aufgebaut")
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    logger.info(f"Baue Vektor-Index: {ddl}")
+    await conn.execute(ddl)
+
+
+async def drop_index(conn, method: str, storage: str = "vector"):
+    await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name(method, storage)}")
+
+
+async def ensure_indexes(conn, method: str, auto_create: bool = True, storage: str = "vector"):
+    """Beim Start prüfen, ob der konfigurierte ANN-Index existiert"""
+    existing = {idx["name"]: idx for idx in await list_indexes(conn)}
+    name = index_name(method, storage)
+
+    if name in existing and existing[name]["valid"]:
+        logger.info(f"Vektor-Index vorhanden: {name} ({existing[name]['size_bytes'] // 1024} KB)")
+        return True
+
+    # IVFFlat braucht Daten zum Trainieren der Listen, nicht auf leerer Tabelle anlegen
+    if method == "ivfflat":
+        has_rows = await conn.fetchval("SELECT EXISTS (SELECT 1 FROM book_chunks)")
+        if not has_rows:
+            logger.warning(f"Vektor-Index {name} fehlt; IVFFlat wird erst mit Daten über /admin/indexes aufgebaut")
+            return False
+
+    if not auto_create:
+        logger.warning(f"Vektor-Index {name} fehlt - Suche läuft als exakter Scan")
+        return False
+
+    await build_index(conn, method, storage=storage)
+    return True
+
+
+async def iterative_scan_mode(conn, mode: str):
+    """Konfigurierten Modus der iterativen Suche prüfen; None, wenn pgvector sie nicht kennt"""
+    if mode not in ITERATIVE_SCAN_MODES:
+        raise ValueError(f"Unbekannter Modus für die iterative Suche '{mode}'")
+    if mode == "off":
+        return None
+    version, parts = await pgvector_version(conn)
+    if parts < MIN_ITERATIVE_VERSION:
+        logger.warning(f"pgvector {version} kennt keine iterative Suche (ab 0.8) - "
+                       f"gefilterte Suchen können weniger Treffer liefern")
+        return None
+    return mode
+
+
+async def apply_search_settings(conn, ef_search: int = None, probes: int = None, iterative_scan: str = None):
+    """Suchgenauigkeit für die laufende Transaktion setzen (SET LOCAL).
+
+    iterative_scan: Ergebnis von iterative_scan_mode (None = nicht setzen).
+    """
+    for key, value in (("ef_search", ef_search), ("probes", probes)):
+        if value is not None:
+            await conn.execute("SELECT set_config($1, $2, true)", SEARCH_SETTINGS[key], str(int(value)))
+    if iterative_scan:
+        await conn.execute("SELECT set_config('hnsw.iterative_scan', $1, true), "
+                           "set_config('ivfflat.iterative_scan', 'relaxed_order', true)", iterative_scan)
@@ -19,13 +19,36 @@ CREATE TABLE book_chunks (
     content TEXT NOT NULL,
     embedding vector(384),  -- all-MiniLM-L6-v2 Dimension
     page_number INTEGER,
+    created_at TIMESTAMP DEFAULT NOW(),
+    -- Volltextsuche (deutsch) für die hybride Suche
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('german', content)) STORED
+);
+
+-- Embedding-Speicher: gleiche Texte (Neuauflagen, Textbausteine) nicht erneut embedden
+CREATE TABLE embedding_store (
+    content_hash BYTEA PRIMARY KEY,  -- sha256(Modellname + normalisierter Text)
+    model VARCHAR(200) NOT NULL,
+    embedding vector(384) NOT NULL,
     created_at TIMESTAMP DEFAULT NOW()
 );
 
 -- Indizes für Performance
 CREATE INDEX book_chunks_book_id_idx ON book_chunks(book_id);
+CREATE INDEX book_chunks_book_chunk_idx ON book_chunks(book_id, chunk_id);
 CREATE INDEX books_book_id_idx ON books(book_id);
 
+CREATE INDEX book_chunks_content_tsv_idx ON book_chunks USING gin (content_tsv);
+
+-- ANN-Index für die Vektorsuche (Kosinus-Distanz); Verwaltung über /admin/indexes
+CREATE INDEX book_chunks_embedding_hnsw_idx ON book_chunks
+    USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+-- Mit VECTOR_STORAGE=halfvec bzw. bit legt die API beim Start stattdessen einen
+-- kompakten Index über der float32-Spalte an (pgvector >= 0.7), z.B.:
+--   CREATE INDEX book_chunks_embedding_hnsw_halfvec_idx ON book_chunks
+--       USING hnsw ((embedding::halfvec(384)) halfvec_cosine_ops);
+--   CREATE INDEX book_chunks_embedding_hnsw_bit_idx ON book_chunks
+--       USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops);
+
 -- Permissions
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO rag_user;
 GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO rag_user;
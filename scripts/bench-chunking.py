@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Micro-Benchmark: Chunking-Strategien auf großen Texten
+(inkl. der alten quadratischen Variante als Vergleich)
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Gemeinsamer Code aus der API
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from chunking import pack_sentences, split_sentences, chunk_text
+
+SENTENCE = "Der Butler berichtete, dass Lord Ravenswood am Abend allein in der Bibliothek gearbeitet hatte."
+
+def pack_quadratic(sentences, chunk_size=100):
+    """Alte Implementierung: Wortzahl des aktuellen Chunks bei jedem Satz neu summiert"""
+    chunks = []
+    current_chunk = []
+
+    for sentence in sentences:
+        current_words = sum(len(s.split()) for s in current_chunk)
+        if current_words + len(sentence.split()) > chunk_size:
+            chunks.append(" ".join(current_chunk))
+            current_chunk = [sentence]
+        else:
+            current_chunk.append(sentence)
+
+    if current_chunk:
+        chunks.append(" ".join(current_chunk))
+
+    return chunks
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chunking strategies')
+    parser.add_argument('--sentences', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Sentence counts of the generated texts')
+    parser.add_argument('--chunk-size', type=int, nargs='+', default=[100, 1000],
+                        help='Chunk sizes in words (large sizes show the quadratic cost)')
+    parser.add_argument('--tokens', action='store_true',
+                        help='Also benchmark the token strategy (loads the tokenizer)')
+    parser.add_argument('--repeat', type=int, default=3)
+
+    args = parser.parse_args()
+
+    print(f"{'Sätze':>8} {'Größe':>6} {'Variante':<18} {'Zeit (ms)':>10} {'Chunks':>7}")
+    print("-" * 54)
+
+    for count in args.sentences:
+        text = " ".join([SENTENCE] * count)
+        sentences = split_sentences(text)
+
+        for chunk_size in args.chunk_size:
+            variants = {
+                "alt (quadratisch)": lambda: pack_quadratic(sentences, chunk_size),
+                "pack (linear)": lambda: pack_sentences(sentences, [len(s.split()) for s in sentences], chunk_size),
+                "sentence": lambda: chunk_text(text, strategy="sentence", chunk_size=chunk_size),
+                "sentence_overlap": lambda: chunk_text(text, strategy="sentence_overlap",
+                                                       chunk_size=chunk_size, overlap=chunk_size // 5),
+            }
+            if args.tokens:
+                variants["tokens"] = lambda: chunk_text(text, strategy="tokens", max_tokens=chunk_size)
+
+            for name, func in variants.items():
+                duration, chunks = timed(func, args.repeat)
+                print(f"{count:>8} {chunk_size:>6} {name:<18} {duration * 1000:>10.1f} {len(chunks):>7}")
+
+if __name__ == "__main__":
+    main()
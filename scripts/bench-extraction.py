@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequentielle vs. parallele PDF-Extraktion (Prozess-Pool) nach Seitenzahl
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Gemeinsamer Code aus der API
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+import fitz  # PyMuPDF
+from ingest import chunk_pdf_file, create_extract_pool, extract_page_range
+
+SENTENCE = ("Inspector Holmes untersuchte den Tatort in der Bibliothek von Schloss Ravenswood "
+            "sehr sorgfältig und notierte jedes Detail. ")
+
+def create_test_pdf(path: str, pages: int):
+    """Synthetisches PDF mit viel Fließtext pro Seite"""
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        text = f"Kapitel {page_num + 1}. " + SENTENCE * 30
+        page.insert_textbox(fitz.Rect(40, 40, 555, 800), text, fontsize=9)
+    doc.save(path)
+    doc.close()
+
+def run(path: str, processes: int, shard_pages: int, repeat: int):
+    pool = create_extract_pool(processes)
+    try:
+        if pool:
+            # Pool einmal anwärmen, im Server lebt er dauerhaft
+            list(pool.map(extract_page_range, [path] * processes, [0] * processes, [1] * processes))
+
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chunks, page_count = chunk_pdf_file(path, pool=pool, shard_pages=shard_pages)
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        return best, chunks, page_count
+    finally:
+        if pool:
+            pool.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parallel PDF extraction')
+    parser.add_argument('--pages', type=int, nargs='+', default=[50, 200, 1000],
+                        help='Page counts for synthetic PDFs')
+    parser.add_argument('--pdf', help='Use an existing PDF instead of synthetic ones')
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=sorted({2, 4, os.cpu_count() or 1}),
+                        help='Process counts to compare against sequential extraction')
+    parser.add_argument('--shard-pages', type=int, default=16,
+                        help='Pages per shard')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per configuration (best is reported)')
+    parser.add_argument('--output', help='Write results as JSON')
+
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.pdf:
+            inputs = [args.pdf]
+        else:
+            inputs = []
+            for pages in args.pages:
+                path = os.path.join(tmp, f"bench-{pages}.pdf")
+                create_test_pdf(path, pages)
+                inputs.append(path)
+
+        print(f"{'Seiten':>7} {'Prozesse':>9} {'Zeit (s)':>9} {'Seiten/s':>9} {'Speedup':>8}")
+        print("-" * 46)
+
+        for path in inputs:
+            baseline, reference, page_count = run(path, 0, args.shard_pages, args.repeat)
+            print(f"{page_count:>7} {'seq':>9} {baseline:>9.2f} {page_count / baseline:>9.1f} {1.0:>8.2f}")
+            results.append({"pages": page_count, "processes": 0, "seconds": baseline, "speedup": 1.0})
+
+            for processes in args.processes:
+                duration, chunks, _ = run(path, processes, args.shard_pages, args.repeat)
+                if chunks != reference:
+                    print(f"❌ Abweichende Chunks bei {processes} Prozessen")
+                    sys.exit(1)
+                speedup = baseline / duration
+                print(f"{page_count:>7} {processes:>9} {duration:>9.2f} {page_count / duration:>9.1f} {speedup:>8.2f}")
+                results.append({"pages": page_count, "processes": processes,
+                                "seconds": duration, "speedup": speedup})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert in: {args.output}")
+
+if __name__ == "__main__":
+    main()
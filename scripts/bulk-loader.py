@@ -1,84 +1,255 @@
 #!/usr/bin/env python3
 """
-Bulk Document Loader für RAG-System (Einfache Version)
+Bulk Document Loader für RAG-System
+
+Lädt PDF-, DOCX- und TXT-Dateien parallel hoch, wiederholt fehlgeschlagene
+Uploads mit Backoff und führt ein Manifest auf der Platte. Ein abgebrochener
+Lauf setzt beim nächsten Start dort fort; Bücher, die schon in /books stehen,
+werden übersprungen.
 """
 
 import os
 import sys
-import requests
+import json
+import time
+import random
+import asyncio
 import argparse
+from datetime import datetime
 from pathlib import Path
 
-def upload_book(api_url: str, pdf_path: Path, book_id: str = None):
-    """Einzelnes Buch hochladen"""
-    
-    if not book_id:
-        book_id = pdf_path.stem
-    
-    try:
-        with open(pdf_path, 'rb') as pdf_file:
-            files = {'file': (pdf_path.name, pdf_file, 'application/pdf')}
-            
-            if book_id != pdf_path.stem:
-                data = {'book_id': book_id}
-                response = requests.post(f"{api_url}/upload-book", files=files, data=data, timeout=300)
-            else:
-                response = requests.post(f"{api_url}/upload-book", files=files, timeout=300)
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ {pdf_path.name} -> {result['chunks_created']} Chunks")
-                return True
+import httpx
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+# Diese Antworten lohnen einen neuen Versuch (Überlast, Neustart, Job läuft noch)
+RETRY_STATUS = {409, 429, 500, 502, 503, 504}
+
+
+class Manifest:
+    """Status je book_id als JSON; wird nach jeder Änderung atomar geschrieben"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries = json.loads(path.read_text()) if path.exists() else {}
+
+    def get(self, book_id: str) -> dict:
+        return self.entries.get(book_id, {})
+
+    def update(self, book_id: str, **fields):
+        entry = self.entries.setdefault(book_id, {})
+        entry.update(fields, updated_at=datetime.now().isoformat())
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, ensure_ascii=False))
+        os.replace(tmp, self.path)
+
+
+class BulkLoader:
+    def __init__(self, client: httpx.AsyncClient, manifest: Manifest, args):
+        self.client = client
+        self.manifest = manifest
+        self.args = args
+        self.totals = {"done": 0, "skipped": 0, "failed": 0, "pages": 0, "chunks": 0}
+
+    async def backoff(self, attempt: int, retry_after: str = None):
+        # Retry-After des Servers hat Vorrang, sonst exponentiell mit Jitter
+        if retry_after and retry_after.isdigit():
+            delay = int(retry_after)
+        else:
+            delay = min(self.args.max_backoff, self.args.backoff * 2 ** attempt)
+        await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+
+    async def wait_for_job(self, job_id: str):
+        """Job-Status pollen bis fertig; None, wenn der Server den Job nicht (mehr) kennt"""
+        errors = 0
+        while True:
+            try:
+                response = await self.client.get(f"/jobs/{job_id}")
+            except httpx.HTTPError:
+                # API kurz weg (Neustart): weiter pollen, danach meldet sie 404
+                errors += 1
+                if errors > self.args.retries:
+                    raise
+                await self.backoff(errors - 1)
+                continue
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            job = response.json()
+            if job["status"] in ("done", "failed"):
+                return job
+            await asyncio.sleep(self.args.poll_interval)
+
+    async def submit(self, path: Path, book_id: str):
+        """Upload mit Wiederholungen; liefert die job_id, None wenn das Buch schon existiert"""
+        for attempt in range(self.args.retries + 1):
+            last = attempt == self.args.retries
+            try:
+                with open(path, "rb") as f:
+                    response = await self.client.post("/upload-book", params={"book_id": book_id},
+                                                      files={"file": (path.name, f)})
+            except httpx.HTTPError as e:
+                if last:
+                    raise
+                print(f"⚠️  {path.name}: {type(e).__name__}, Versuch {attempt + 1}/{self.args.retries}")
+                await self.backoff(attempt)
+                continue
+
+            if response.status_code == 202:
+                return response.json()["job_id"]
+            if response.status_code == 400 and "existiert bereits" in response.text:
+                return None
+            if response.status_code in RETRY_STATUS and not last:
+                print(f"⚠️  {path.name}: HTTP {response.status_code}, Versuch {attempt + 1}/{self.args.retries}")
+                await self.backoff(attempt, response.headers.get("Retry-After"))
+                continue
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+
+    async def load(self, path: Path, book_id: str):
+        entry = self.manifest.get(book_id)
+        try:
+            job = None
+            # Fortsetzen: Job aus dem letzten Lauf abwarten, falls der Server ihn noch kennt
+            if entry.get("status") == "running" and entry.get("job_id"):
+                print(f"↻  {path.name}: setze Job {entry['job_id']} fort")
+                job = await self.wait_for_job(entry["job_id"])
+
+            for attempt in range(self.args.retries + 1):
+                if job is None:
+                    job_id = await self.submit(path, book_id)
+                    if job_id is None:
+                        self.manifest.update(book_id, file=str(path), status="done", existing=True)
+                        self.totals["skipped"] += 1
+                        print(f"⏭️  {path.name} -> bereits vorhanden")
+                        return
+                    self.manifest.update(book_id, file=str(path), status="running", job_id=job_id)
+                    job = await self.wait_for_job(job_id)
+
+                if job is not None and job["status"] == "done":
+                    break
+                # Job verloren (API neu gestartet) oder fehlgeschlagen: neu hochladen
+                error = job["error"] if job else "Job auf dem Server nicht mehr bekannt"
+                if attempt == self.args.retries:
+                    raise RuntimeError(error)
+                print(f"⚠️  {path.name}: {error}, Versuch {attempt + 1}/{self.args.retries}")
+                job = None
+                await self.backoff(attempt)
+
+            result = job.get("result") or {}
+            pages = result.get("pages_processed", 0)
+            chunks = result.get("chunks_created", 0)
+            self.manifest.update(book_id, file=str(path), status="done", job_id=job["job_id"],
+                                 pages=pages, chunks=chunks, error=None)
+            self.totals["done"] += 1
+            self.totals["pages"] += pages
+            self.totals["chunks"] += chunks
+            print(f"✅ {path.name} -> {chunks} Chunks, {pages} Seiten")
+
+        except Exception as e:
+            self.manifest.update(book_id, file=str(path), status="failed", error=str(e))
+            self.totals["failed"] += 1
+            print(f"❌ {path.name} -> Fehler: {e}")
+
+
+def find_files(directory: Path, recursive: bool):
+    pattern = "**/*" if recursive else "*"
+    return sorted(p for p in directory.glob(pattern)
+                  if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS)
+
+async def run(args):
+    directory = Path(args.directory)
+    files = find_files(directory, args.recursive)
+    if not files:
+        print(f"❌ Keine PDF-, DOCX- oder TXT-Dateien in {directory} gefunden")
+        sys.exit(1)
+
+    manifest = Manifest(Path(args.manifest) if args.manifest else directory / ".bulk-loader-manifest.json")
+
+    limits = httpx.Limits(max_connections=args.parallel * 2 + 2)
+    async with httpx.AsyncClient(base_url=args.api_url, timeout=args.timeout, limits=limits) as client:
+        # API Readiness Check
+        try:
+            ready_response = await client.get("/ready")
+            if ready_response.status_code != 200:
+                print(f"❌ API nicht bereit: {args.api_url}")
+                sys.exit(1)
+            print(f"✅ API verfügbar: {args.api_url}")
+        except httpx.HTTPError as e:
+            print(f"❌ API nicht erreichbar: {e}")
+            sys.exit(1)
+
+        books_response = await client.get("/books")
+        books_response.raise_for_status()
+        existing = {book["book_id"] for book in books_response.json()["books"]}
+
+        todo = []
+        skipped = 0
+        for path in files:
+            book_id = f"{args.prefix}{path.stem}"
+            if book_id in existing:
+                if manifest.get(book_id).get("status") != "done":
+                    manifest.update(book_id, file=str(path), status="done", existing=True)
+                skipped += 1
             else:
-                print(f"❌ {pdf_path.name} -> Fehler: {response.text}")
-                return False
-                
-    except Exception as e:
-        print(f"❌ {pdf_path.name} -> Exception: {e}")
-        return False
+                todo.append((path, book_id))
+
+        print(f"📚 {len(files)} Dateien gefunden, {skipped} bereits geladen, "
+              f"{len(todo)} zu laden ({args.parallel} parallel)")
+
+        loader = BulkLoader(client, manifest, args)
+        loader.totals["skipped"] = skipped
+        semaphore = asyncio.Semaphore(args.parallel)
+
+        async def bounded(path, book_id):
+            async with semaphore:
+                await loader.load(path, book_id)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded(path, book_id) for path, book_id in todo))
+        elapsed = time.perf_counter() - started
+
+    totals = loader.totals
+    print(f"\n📊 Ergebnis: {totals['done']} geladen, {totals['skipped']} übersprungen, "
+          f"{totals['failed']} fehlgeschlagen in {elapsed:.1f}s")
+    if totals["done"] and elapsed > 0:
+        print(f"   Durchsatz: {totals['pages'] / elapsed:.1f} Seiten/s, "
+              f"{totals['chunks'] / elapsed:.1f} Chunks/s, "
+              f"{totals['done'] / elapsed * 60:.1f} Bücher/min")
+    print(f"   Manifest: {manifest.path}")
+    if totals["failed"]:
+        sys.exit(2)
 
 def main():
-    parser = argparse.ArgumentParser(description='Bulk upload PDFs to RAG system')
-    parser.add_argument('directory', help='Directory containing PDF files')
-    parser.add_argument('--api-url', default='http://localhost:28080', 
+    parser = argparse.ArgumentParser(description='Bulk upload PDF, DOCX and TXT files to RAG system')
+    parser.add_argument('directory', help='Directory containing the documents')
+    parser.add_argument('--api-url', default='http://localhost:28080',
                        help='API base URL')
-    parser.add_argument('--prefix', default='', 
+    parser.add_argument('--prefix', default='',
                        help='Prefix for book IDs')
-    
+    parser.add_argument('--parallel', type=int, default=4,
+                       help='Uploads in flight at the same time')
+    parser.add_argument('--retries', type=int, default=5,
+                       help='Retries per book (network errors, 503, failed jobs)')
+    parser.add_argument('--backoff', type=float, default=2.0,
+                       help='Initial backoff in seconds, doubled per retry')
+    parser.add_argument('--max-backoff', type=float, default=120.0,
+                       help='Upper bound for the backoff in seconds')
+    parser.add_argument('--manifest',
+                       help='Manifest file (default: <directory>/.bulk-loader-manifest.json)')
+    parser.add_argument('--recursive', action='store_true',
+                       help='Include subdirectories')
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                       help='Seconds between job status requests')
+    parser.add_argument('--timeout', type=float, default=300.0,
+                       help='HTTP timeout in seconds (large uploads)')
+
     args = parser.parse_args()
-    
-    pdf_dir = Path(args.directory)
-    if not pdf_dir.exists():
-        print(f"❌ Verzeichnis {pdf_dir} existiert nicht")
-        sys.exit(1)
-    
-    # Alle PDF-Dateien finden
-    pdf_files = list(pdf_dir.glob("*.pdf"))
-    if not pdf_files:
-        print(f"❌ Keine PDF-Dateien in {pdf_dir} gefunden")
-        sys.exit(1)
-    
-    print(f"📚 {len(pdf_files)} PDF-Dateien gefunden")
-    
-    # API Health Check
-    try:
-        health_response = requests.get(f"{args.api_url}/health", timeout=10)
-        if health_response.status_code != 200:
-            print(f"❌ API nicht verfügbar: {args.api_url}")
-            sys.exit(1)
-        print(f"✅ API verfügbar: {args.api_url}")
-    except Exception as e:
-        print(f"❌ API nicht erreichbar: {e}")
+
+    if not Path(args.directory).exists():
+        print(f"❌ Verzeichnis {args.directory} existiert nicht")
         sys.exit(1)
-    
-    # Bücher hochladen
-    successful = 0
-    for pdf_file in pdf_files:
-        book_id = f"{args.prefix}{pdf_file.stem}" if args.prefix else pdf_file.stem
-        if upload_book(args.api_url, pdf_file, book_id):
-            successful += 1
-    
-    print(f"\n📊 Ergebnis: {successful}/{len(pdf_files)} Bücher erfolgreich hochgeladen")
+
+    asyncio.run(run(args))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,58 +1,39 @@
-import fitz  # PyMuPDF
-import nltk
+import argparse
 import sys
-from nltk.tokenize import sent_tokenize
+from pathlib import Path
 
-nltk.download('punkt')
-nltk.download('punkt_tab')
+# Gemeinsames Chunking aus der API
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
 
-def chunk_text_by_sentences(text, chunk_size=100):
-    sentences = sent_tokenize(text)
-    chunks = []
-    current_chunk = []
-
-    for sentence in sentences:
-        current_words = sum(len(s.split()) for s in current_chunk)
-        if current_words + len(sentence.split()) > chunk_size:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [sentence]
-        else:
-            current_chunk.append(sentence)
-
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
-
-    return chunks
-
-def chunk_pdf_with_metadata(pdf_path, chunk_size=100):
-    doc = fitz.open(pdf_path)
-    all_chunks = []
-
-    for page_num, page in enumerate(doc):
-        text = page.get_text()
-        if not text.strip():
-            continue
-
-        chunks = chunk_text_by_sentences(text, chunk_size=chunk_size)
-        for i, chunk in enumerate(chunks):
-            all_chunks.append({
-                "page": page_num + 1,
-                "chunk_index": i,
-                "text": chunk
-            })
-
-    return all_chunks
+from chunking import STRATEGIES
+from ingest import chunk_pdf_file
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python chunk_pdf.py <pdf_path>")
-        sys.exit(1)
-
-    pdf_path = sys.argv[1]
-    chunks = chunk_pdf_with_metadata(pdf_path, chunk_size=100)
+    parser = argparse.ArgumentParser(description='Chunk a PDF like the RAG API does')
+    parser.add_argument('pdf_path', help='PDF file to chunk')
+    parser.add_argument('--strategy', default='sentence', choices=list(STRATEGIES),
+                        help='Chunking strategy')
+    parser.add_argument('--chunk-size', type=int, default=100,
+                        help='Max words per chunk (sentence strategies)')
+    parser.add_argument('--overlap', type=int, default=20,
+                        help='Overlap in words/tokens (sentence_overlap, tokens)')
+    parser.add_argument('--max-tokens', type=int, default=200,
+                        help='Max tokens per chunk (tokens strategy)')
+
+    args = parser.parse_args()
+
+    chunking = {"strategy": args.strategy}
+    if args.strategy == "tokens":
+        chunking.update(max_tokens=args.max_tokens, overlap=args.overlap)
+    else:
+        chunking["chunk_size"] = args.chunk_size
+        if args.strategy == "sentence_overlap":
+            chunking["overlap"] = args.overlap
+
+    chunks, _ = chunk_pdf_file(args.pdf_path, chunking=chunking)
 
     for chunk in chunks:
         print(f"\n--- Seite {chunk['page']} | Chunk {chunk['chunk_index']} ---\n{chunk['text']}\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
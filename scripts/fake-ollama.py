@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Ollama-Attrappe für Benchmarks ohne LLM: /api/generate mit einstellbarer Latenz und Streaming
+
+Beispiel:
+  python scripts/fake-ollama.py --port 11434 --latency 0.2 --tokens 50 --token-delay 0.01
+  OLLAMA_URL=http://localhost:11434 uvicorn main:app ...
+"""
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("Laut dem Kontext aus dem Buch war der Butler zur fraglichen Zeit in der "
+         "Bibliothek und hat den Inspektor über die Ereignisse des Abends informiert").split()
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-Alive wie bei Ollama, Streaming per chunked
+    config = None
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, payload: dict):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": self.config.model}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.config
+
+        if config.error_rate and random.random() < config.error_rate:
+            self._send_json(500, {"error": "simulierter Fehler"})
+            return
+
+        started = time.perf_counter()
+        prompt_tokens = len(request.get("prompt", "").split())
+        latency = max(0.0, random.gauss(config.latency, config.jitter)) if config.jitter else config.latency
+        tokens = [WORDS[i % len(WORDS)] + " " for i in range(config.tokens)]
+        model = request.get("model", config.model)
+
+        def final(response_text: str) -> dict:
+            return {
+                "model": model,
+                "response": response_text,
+                "done": True,
+                "prompt_eval_count": prompt_tokens,
+                "eval_count": len(tokens),
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+            }
+
+        time.sleep(latency)
+
+        if not request.get("stream", True):
+            time.sleep(config.token_delay * len(tokens))
+            self._send_json(200, final("".join(tokens).strip()))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for token in tokens:
+                self._write_chunk({"model": model, "response": token, "done": False})
+                time.sleep(config.token_delay)
+            self._write_chunk(final(""))
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hat abgebrochen (z.B. /ask/stream getrennt)
+            self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Ollama server for load tests')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--model', default='llama3.1:8b')
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help='Seconds until the first token')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Std deviation of the latency in seconds')
+    parser.add_argument('--tokens', type=int, default=40,
+                        help='Tokens per answer')
+    parser.add_argument('--token-delay', type=float, default=0.02,
+                        help='Seconds per generated token')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with HTTP 500')
+    parser.add_argument('--verbose', action='store_true')
+
+    args = parser.parse_args()
+
+    FakeOllamaHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), FakeOllamaHandler)
+    server.daemon_threads = True
+    print(f"🦙 Fake-Ollama auf {args.host}:{args.port} "
+          f"(Latenz {args.latency}s, {args.tokens} Tokens à {args.token_delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Lastgenerator für die RAG-API: /ask, /ask/stream, /search und /upload-book unter Parallelität
+
+Geschlossene Last (--concurrency Worker, jeder schickt sofort die nächste
+Anfrage) oder offene Last (--rate Ankünfte pro Sekunde, Poisson-verteilt;
+die Latenz zählt ab dem geplanten Ankunftszeitpunkt, Warten inklusive).
+Ergebnisse (p50/p95/p99, Durchsatz, Fehler) werden als JSON gespeichert und
+lassen sich mit --baseline gegen einen früheren Lauf vergleichen.
+
+Wiederholte Fragen treffen den Antwort-Cache oder werden mit einer laufenden
+Generierung zusammengefasst; der Bericht zeigt deshalb die Anteile 'cached'
+und 'coalesced'. --unique-questions hängt jeder Frage eine eindeutige Kennung
+an. Ähnliche Fragen kann der semantische Cache trotzdem treffen - für reine
+LLM-Latenzen die API mit ANSWER_CACHE_SIZE=0 starten.
+
+Beispiele:
+  python scripts/load-test.py --mix ask=8,search=2 --concurrency 16 --duration 60 --output run.json
+  python scripts/load-test.py --mix search=1 --rate 50 --requests 2000 --baseline run.json
+  python scripts/load-test.py --mix ask=1 --unique-questions --concurrency 4 --requests 200
+  python scripts/load-test.py --mix upload=1 --upload-dir ./books --wait-jobs --cleanup --requests 5
+
+Ohne LLM: scripts/fake-ollama.py starten und die API mit OLLAMA_URL darauf zeigen lassen.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+ENDPOINTS = ("ask", "ask-stream", "search", "upload")
+
+DEFAULT_QUESTIONS = [
+    "Wer ist der Hauptverdächtige?",
+    "Wo wurde Lord Ravenswood gefunden?",
+    "Was hat der Butler ausgesagt?",
+    "Welche Hinweise fand Inspector Holmes am Tatort?",
+    "Wann wurde die Bibliothek zuletzt betreten?",
+    "Wie endet die Geschichte?",
+    "Welche Rolle spielt der Gärtner?",
+    "Was stand in den Dokumenten auf dem Schreibtisch?",
+]
+
+def percentile(sorted_values, p: float):
+    """Nearest-Rank-Perzentil einer sortierten Liste"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies, errors: dict, count: int, elapsed: float, ttft=None, flags=None):
+    values = sorted(latencies)
+    summary = {
+        "requests": count,
+        "ok": len(values),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / count, 4) if count else 0,
+        "errors_by_status": dict(errors),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "mean": round(sum(values) / len(values) * 1000, 1) if values else None,
+            "p50": round(percentile(values, 50) * 1000, 1) if values else None,
+            "p95": round(percentile(values, 95) * 1000, 1) if values else None,
+            "p99": round(percentile(values, 99) * 1000, 1) if values else None,
+            "max": round(values[-1] * 1000, 1) if values else None,
+        },
+    }
+    if ttft:
+        ttft = sorted(ttft)
+        summary["time_to_first_token_ms"] = {
+            "p50": round(percentile(ttft, 50) * 1000, 1),
+            "p95": round(percentile(ttft, 95) * 1000, 1),
+            "p99": round(percentile(ttft, 99) * 1000, 1),
+        }
+    if flags:
+        summary["cache_hit_rate"] = round(flags["cached"] / flags["answered"], 4)
+        summary["coalesced_rate"] = round(flags["coalesced"] / flags["answered"], 4)
+    return summary
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.ttft = {}
+        self.errors = {}
+        self.counts = {}
+        self.flags = {}
+
+    def record(self, endpoint: str, latency: float, status, ttft: float = None, flags: dict = None):
+        self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+        if status == 200 or status == 202:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            if ttft is not None:
+                self.ttft.setdefault(endpoint, []).append(ttft)
+            if flags is not None:
+                # Antworten aus Cache bzw. einer gemeinsamen Generierung zählen
+                counts = self.flags.setdefault(endpoint, {"answered": 0, "cached": 0, "coalesced": 0})
+                counts["answered"] += 1
+                counts["cached"] += bool(flags.get("cached"))
+                counts["coalesced"] += bool(flags.get("coalesced"))
+        else:
+            errors = self.errors.setdefault(endpoint, {})
+            errors[str(status)] = errors.get(str(status), 0) + 1
+
+    def summary(self, elapsed: float):
+        results = {
+            endpoint: summarize(self.latencies.get(endpoint, []), self.errors.get(endpoint, {}),
+                                count, elapsed, self.ttft.get(endpoint), self.flags.get(endpoint))
+            for endpoint, count in sorted(self.counts.items())
+        }
+        all_errors = {}
+        for errors in self.errors.values():
+            for status, n in errors.items():
+                all_errors[status] = all_errors.get(status, 0) + n
+        all_flags = {}
+        for flags in self.flags.values():
+            for key, n in flags.items():
+                all_flags[key] = all_flags.get(key, 0) + n
+        total = summarize([l for ls in self.latencies.values() for l in ls], all_errors,
+                          sum(self.counts.values()), elapsed, flags=all_flags)
+        return results, total
+
+#----------------------------------------
+# Einzelne Anfragen; liefern (status, ttft, flags)
+#----------------------------------------
+
+def pick_question(args, workload):
+    question = random.choice(workload["questions"])
+    if args.unique_questions:
+        # Eigene Frage je Anfrage: kein exakter Cache-Treffer, kein Zusammenfassen
+        question = f"{question} [{uuid.uuid4().hex[:8]}]"
+    return question
+
+def answer_flags(payload: dict):
+    return {"cached": payload.get("cached", False), "coalesced": payload.get("coalesced", False)}
+
+async def do_ask(client, args, workload):
+    response = await client.post("/ask", json={
+        "question": pick_question(args, workload),
+        "book_id": random.choice(workload["books"]),
+        "max_results": args.max_results,
+    })
+    if response.status_code != 200:
+        return response.status_code, None, None
+    return 200, None, answer_flags(response.json())
+
+async def do_ask_stream(client, args, workload):
+    started = time.perf_counter()
+    ttft = None
+    flags = None
+    async with client.stream("POST", "/ask/stream", json={
+        "question": pick_question(args, workload),
+        "book_id": random.choice(workload["books"]),
+        "max_results": args.max_results,
+    }) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return response.status_code, None, None
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "token" and ttft is None:
+                ttft = time.perf_counter() - started
+            elif event["type"] == "done":
+                flags = answer_flags(event)
+            elif event["type"] == "error":
+                return "stream_error", None, None
+    return 200, ttft, flags
+
+async def do_search(client, args, workload):
+    payload = {"query": pick_question(args, workload), "top_k": args.top_k}
+    if workload["books"] and not args.search_all:
+        payload["book_id"] = random.choice(workload["books"])
+    response = await client.post("/search", json=payload)
+    return response.status_code, None, None
+
+async def do_upload(client, args, workload):
+    path = random.choice(workload["files"])
+    book_id = f"loadtest-{uuid.uuid4().hex[:12]}"
+    with open(path, "rb") as f:
+        response = await client.post("/upload-book", params={"book_id": book_id},
+                                     files={"file": (path.name, f)})
+    if response.status_code != 202:
+        return response.status_code, None, None
+    workload["uploaded"].append(book_id)
+
+    if not args.wait_jobs:
+        return 202, None, None
+
+    # Ende-zu-Ende: bis der Job fertig ist
+    job_id = response.json()["job_id"]
+    while True:
+        await asyncio.sleep(args.poll_interval)
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] == "done":
+            return 200, None, None
+        if job["status"] == "failed":
+            return "job_failed", None, None
+
+OPERATIONS = {
+    "ask": do_ask,
+    "ask-stream": do_ask_stream,
+    "search": do_search,
+    "upload": do_upload,
+}
+
+#----------------------------------------
+# Lastmodelle
+#----------------------------------------
+
+async def run_one(client, endpoint, args, workload, recorder, scheduled_at: float):
+    try:
+        status, ttft, flags = await OPERATIONS[endpoint](client, args, workload)
+    except httpx.TimeoutException:
+        status, ttft, flags = "timeout", None, None
+    except httpx.HTTPError as e:
+        status, ttft, flags = type(e).__name__, None, None
+    recorder.record(endpoint, time.perf_counter() - scheduled_at, status, ttft, flags)
+
+def parse_mix(mix: str):
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"❌ Unbekannter Endpunkt '{name}' (verfügbar: {', '.join(ENDPOINTS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+async def run_load(client, args, workload, recorder):
+    endpoints, weights = zip(*parse_mix(args.mix).items())
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    budget = {"left": args.requests}
+
+    def next_endpoint():
+        if deadline and time.perf_counter() >= deadline:
+            return None
+        if budget["left"] is not None:
+            if budget["left"] <= 0:
+                return None
+            budget["left"] -= 1
+        return random.choices(endpoints, weights)[0]
+
+    if args.rate:
+        # Offene Last: Ankünfte unabhängig von den Antworten, höchstens concurrency gleichzeitig
+        semaphore = asyncio.Semaphore(args.concurrency)
+        tasks = []
+
+        async def arrival(endpoint, scheduled_at):
+            async with semaphore:
+                await run_one(client, endpoint, args, workload, recorder, scheduled_at)
+
+        while (endpoint := next_endpoint()) is not None:
+            tasks.append(asyncio.create_task(arrival(endpoint, time.perf_counter())))
+            await asyncio.sleep(random.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+    else:
+        # Geschlossene Last: jeder Worker schickt sofort die nächste Anfrage
+        async def worker():
+            while (endpoint := next_endpoint()) is not None:
+                await run_one(client, endpoint, args, workload, recorder, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+#----------------------------------------
+# Ausgabe
+#----------------------------------------
+
+def print_results(results: dict, total: dict):
+    print(f"\n{'Endpunkt':<12} {'Anfr.':>6} {'Fehler':>7} {'RPS':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    print("-" * 76)
+    for name, summary in list(results.items()) + [("gesamt", total)]:
+        latency = summary["latency_ms"]
+        fmt = lambda v: f"{v:>9.1f}" if v is not None else f"{'-':>9}"
+        print(f"{name:<12} {summary['requests']:>6} {summary['error_rate']:>7.1%} {summary['throughput_rps']:>8.2f}"
+              f"{fmt(latency['p50'])}{fmt(latency['p95'])}{fmt(latency['p99'])}{fmt(latency['max'])}")
+        if "time_to_first_token_ms" in summary:
+            t = summary["time_to_first_token_ms"]
+            print(f"{'  TTFT':<12} {'':>6} {'':>7} {'':>8}{fmt(t['p50'])}{fmt(t['p95'])}{fmt(t['p99'])}")
+        if "cache_hit_rate" in summary:
+            print(f"{'':<12} Cache-Treffer {summary['cache_hit_rate']:.1%}, "
+                  f"zusammengefasst {summary['coalesced_rate']:.1%}")
+        if summary["errors_by_status"]:
+            print(f"{'':<12} Fehler: {summary['errors_by_status']}")
+
+def print_comparison(results: dict, baseline_path: str):
+    baseline = json.loads(Path(baseline_path).read_text())["results"]
+    print(f"\nVergleich mit {baseline_path} (Änderung ggü. Baseline):")
+    for name, summary in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("p50", "p95", "p99"):
+            before, after = old["latency_ms"][key], summary["latency_ms"][key]
+            if before and after is not None:
+                changes.append(f"{key} {(after - before) / before:+.1%}")
+        if old["throughput_rps"]:
+            changes.append(f"RPS {(summary['throughput_rps'] - old['throughput_rps']) / old['throughput_rps']:+.1%}")
+        changes.append(f"Fehler {old['error_rate']:.1%} -> {summary['error_rate']:.1%}")
+        if "cache_hit_rate" in old and "cache_hit_rate" in summary:
+            changes.append(f"Cache {old['cache_hit_rate']:.1%} -> {summary['cache_hit_rate']:.1%}")
+        print(f"  {name:<12} " + ", ".join(changes))
+
+#----------------------------------------
+
+def load_questions(path: str):
+    """Eine Frage pro Zeile oder JSONL mit {"question": ...}"""
+    if not path:
+        return DEFAULT_QUESTIONS
+    questions = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        questions.append(json.loads(line)["question"] if line.startswith("{") else line)
+    return questions
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 4, max_keepalive_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.api_url, timeout=args.timeout, limits=limits) as client:
+        ready = await client.get("/ready")
+        if ready.status_code != 200:
+            print(f"❌ API nicht bereit: {ready.status_code} {ready.text[:200]}")
+            sys.exit(1)
+
+        books = args.book_id or [b["book_id"] for b in (await client.get("/books")).json()["books"]]
+        mix = parse_mix(args.mix)
+        if not books and any(e in mix for e in ("ask", "ask-stream")):
+            print("❌ Keine Bücher vorhanden (--book-id angeben oder zuerst hochladen)")
+            sys.exit(1)
+
+        files = []
+        if "upload" in mix:
+            if not args.upload_dir:
+                print("❌ Für upload wird --upload-dir benötigt")
+                sys.exit(1)
+            files = sorted(p for p in Path(args.upload_dir).iterdir()
+                           if p.suffix.lower() in (".pdf", ".docx", ".txt"))
+
+        workload = {"questions": load_questions(args.questions), "books": books,
+                    "files": files, "uploaded": []}
+        print(f"🚀 Mix {args.mix} | {'Rate ' + str(args.rate) + '/s, ' if args.rate else ''}"
+              f"Parallelität {args.concurrency} | "
+              f"{str(args.duration) + ' s' if args.duration else str(args.requests) + ' Anfragen'} | "
+              f"{len(workload['questions'])} Fragen, {len(books)} Bücher")
+
+        # Aufwärmen (nicht gemessen)
+        for _ in range(args.warmup):
+            await run_one(client, random.choice(list(mix)), args, workload, Recorder(), time.perf_counter())
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        await run_load(client, args, workload, recorder)
+        elapsed = time.perf_counter() - started
+
+        results, total = recorder.summary(elapsed)
+        print_results(results, total)
+
+        server_stats = None
+        try:
+            server_stats = (await client.get("/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            pass
+
+        if args.cleanup:
+            for book_id in workload["uploaded"]:
+                await client.delete(f"/books/{book_id}")
+            print(f"🧹 {len(workload['uploaded'])} Testbücher gelöscht")
+
+    report = {
+        "started_at": datetime.now().isoformat(),
+        "config": vars(args),
+        "elapsed_seconds": round(elapsed, 2),
+        "results": results,
+        "total": total,
+        "server_stats": server_stats,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"💾 Ergebnisse gespeichert: {args.output}")
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent load test for the RAG API')
+    parser.add_argument('--api-url', default='http://localhost:28080')
+    parser.add_argument('--mix', default='ask=1',
+                        help=f'Weighted endpoints, e.g. ask=8,search=2 ({", ".join(ENDPOINTS)})')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Workers (closed loop) or max in-flight requests (open loop)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='Open loop: Poisson arrivals per second')
+    parser.add_argument('--duration', type=float, default=None, help='Run for N seconds')
+    parser.add_argument('--requests', type=int, default=None, help='Run N requests')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests before the run')
+    parser.add_argument('--questions', help='Question corpus (one per line or JSONL)')
+    parser.add_argument('--unique-questions', action='store_true',
+                        help='Append a per-request nonce to each question (defeats exact cache hits and coalescing)')
+    parser.add_argument('--book-id', action='append', help='Book(s) to query (default: all from /books)')
+    parser.add_argument('--max-results', type=int, default=3)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--search-all', action='store_true', help='Search the whole library')
+    parser.add_argument('--upload-dir', help='Directory with PDF/DOCX/TXT files for upload')
+    parser.add_argument('--wait-jobs', action='store_true',
+                        help='Measure uploads until the ingestion job is done')
+    parser.add_argument('--poll-interval', type=float, default=0.5)
+    parser.add_argument('--cleanup', action='store_true', help='Delete uploaded test books afterwards')
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', help='Save results as JSON')
+    parser.add_argument('--baseline', help='Compare with a previous JSON result')
+    parser.add_argument('--seed', type=int, default=None)
+
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.requests = 100
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,11 @@ BASE_URL="http://localhost:28080"
 echo "1. Health Check..."
 health_response=$(curl -s ${BASE_URL}/health)
 echo "Response: $health_response"
+ready_response=$(curl -s ${BASE_URL}/ready)
+echo "Ready: $ready_response"
 
-if [[ $health_response == *"healthy"* ]]; then
-    echo "✅ API ist gesund"
+if [[ $health_response == *"healthy"* && $ready_response == *"\"ready\""* ]]; then
+    echo "✅ API ist gesund und bereit"
 else
     echo "❌ API nicht verfügbar - prüfen Sie docker-compose logs rag-api"
     exit 1
@@ -53,7 +55,19 @@ for test_file in "./books/demo-krimi.txt" "./books/demo-krimi.pdf" "./books/demo
             -F "file=@$test_file" \
             ${BASE_URL}/upload-book)
         
-        if [[ $upload_response == *"erfolgreich"* ]]; then
+        # Upload läuft als Job - warten bis er fertig ist
+        job_id=$(echo $upload_response | grep -o '"job_id":"[^"]*"' | cut -d'"' -f4)
+        if [ -n "$job_id" ]; then
+            for i in {1..150}; do
+                upload_response=$(curl -s ${BASE_URL}/jobs/$job_id)
+                if [[ $upload_response == *'"status":"done"'* ]] || [[ $upload_response == *'"status":"failed"'* ]]; then
+                    break
+                fi
+                sleep 2
+            done
+        fi
+        
+        if [[ $upload_response == *'"status":"done"'* ]]; then
             echo "✅ Upload erfolgreich"
             
             # Test-Frage stellen
@@ -80,7 +80,7 @@ done
 # RAG-API prüfen
 echo "Prüfe RAG-API..."
 for i in {1..30}; do
-    if curl -s http://localhost:28080/health >/dev/null 2>&1; then
+    if curl -sf http://localhost:28080/ready >/dev/null 2>&1; then
         echo "✅ RAG-API ist bereit"
         break
     fi
@@ -0,0 +1,101 @@
+"""
+Tests für den semantischen Antwort-Cache (api/answer_cache.py)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+import answer_cache
+from answer_cache import AnswerCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def vec(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_same_question_hits_after_normalization():
+    cache = AnswerCache()
+    cache.put("buch", "Wer ist der Täter?", vec(1, 0), {"answer": "Der Butler"})
+
+    assert cache.get("buch", "  wer ist der   täter ", vec(0, 1)) == ({"answer": "Der Butler"}, 1.0)
+    assert cache.get("anderes-buch", "Wer ist der Täter?", vec(1, 0)) is None
+
+
+def test_params_must_match():
+    cache = AnswerCache()
+    cache.put("buch", "Frage", vec(1, 0), "antwort", params=(5,))
+    assert cache.get("buch", "Frage", vec(1, 0), params=(10,)) is None
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = AnswerCache(similarity_threshold=0.9)
+    cache.put("buch", "Wer war es?", vec(1, 0), "antwort")
+
+    # cos = 0.8 / 1.0: knapp unter dem Schwellwert
+    assert cache.get("buch", "Wer hat es getan?", vec(0.8, 0.6)) is None
+    # cos ≈ 0.995
+    response, similarity = cache.get("buch", "Wer hat es getan?", vec(0.995, 0.0999))
+    assert response == "antwort"
+    assert 0.9 <= similarity < 1.0
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(answer_cache.time, "monotonic", clock)
+    cache = AnswerCache(ttl_seconds=60)
+    cache.put("buch", "Frage", vec(1, 0), "antwort")
+
+    clock.now += 59
+    assert cache.get("buch", "Frage", vec(1, 0)) is not None
+    clock.now += 2
+    # Weder exakter noch semantischer Treffer, Eintrag wird entfernt
+    assert cache.get("buch", "Frage", vec(1, 0)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_invalidate_book_drops_entries_and_bumps_version():
+    cache = AnswerCache()
+    cache.put("buch", "Frage", vec(1, 0), "antwort")
+    cache.put("anderes-buch", "Frage", vec(1, 0), "andere antwort")
+
+    assert cache.invalidate_book("buch") == 1
+    assert cache.get("buch", "Frage", vec(1, 0)) is None
+    assert cache.get("anderes-buch", "Frage", vec(1, 0)) is not None
+    assert cache.book_version("buch") == 1
+
+
+def test_answer_generated_before_invalidation_is_not_stored():
+    cache = AnswerCache()
+    version = cache.book_version("buch")
+    # Buch wird während der Generierung aktualisiert
+    cache.invalidate_book("buch")
+    cache.put("buch", "Frage", vec(1, 0), "veraltet", version=version)
+    assert cache.get("buch", "Frage", vec(1, 0)) is None
+
+    cache.put("buch", "Frage", vec(1, 0), "aktuell", version=cache.book_version("buch"))
+    assert cache.get("buch", "Frage", vec(1, 0)) == ("aktuell", 1.0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("buch", "eins", vec(1, 0, 0), 1)
+    cache.put("buch", "zwei", vec(0, 1, 0), 2)
+    cache.get("buch", "eins", vec(1, 0, 0))
+    cache.put("buch", "drei", vec(0, 0, 1), 3)
+
+    assert cache.get("buch", "zwei", vec(0, 1, 0)) is None
+    assert cache.get("buch", "eins", vec(1, 0, 0)) == (1, 1.0)
+    assert cache.stats()["evictions"] == 1
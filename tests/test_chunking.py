@@ -0,0 +1,43 @@
+"""
+Tests für das Packen von Sätzen zu Chunks (api/chunking.py)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from chunking import pack_sentences
+
+
+def pack(sentences, budget, overlap=0):
+    return pack_sentences(sentences, [len(s.split()) for s in sentences], budget, overlap)
+
+
+def test_sentences_are_packed_up_to_the_budget():
+    sentences = ["a b", "c d", "e f", "g"]
+    assert pack(sentences, budget=4) == ["a b c d", "e f g"]
+
+
+def test_sentence_over_budget_becomes_its_own_chunk():
+    sentences = ["a", "b c d e f", "g"]
+    assert pack(sentences, budget=3) == ["a", "b c d e f", "g"]
+
+
+def test_empty_input_gives_no_chunks():
+    assert pack([], budget=10) == []
+
+
+def test_overlap_repeats_trailing_sentences():
+    sentences = ["a b", "c", "d e", "f"]
+    # "c" (1 Wort) passt in overlap=1 und wird an den Anfang des nächsten Chunks
+    # übernommen; "d e" (2 Wörter) ist größer als overlap und wird nicht wiederholt
+    assert pack(sentences, budget=3, overlap=1) == ["a b c", "c d e", "f"]
+
+
+def test_overlap_never_exceeds_budget():
+    sentences = ["a b", "c d", "e f"]
+    # Überlappung "c d" (2) plus "e f" (2) wäre über budget=3 -> keine Überlappung
+    chunks = pack(sentences, budget=3, overlap=2)
+    assert chunks == ["a b", "c d", "e f"]
+    assert all(len(chunk.split()) <= 3 for chunk in chunks)
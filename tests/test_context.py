@@ -0,0 +1,82 @@
+"""
+Tests für den Kontext-Aufbau (api/context.py)
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from context import build_context
+
+
+def count_words(texts):
+    return [len(text.split()) for text in texts]
+
+
+def hit(page, chunk_id, content, embedding, **extra):
+    return {"page_number": page, "chunk_id": chunk_id, "content": content,
+            "embedding": np.array(embedding, dtype=np.float32), **extra}
+
+
+def test_same_chunk_id_on_different_pages_is_not_a_duplicate():
+    # Bei PDFs beginnt chunk_id auf jeder Seite bei 0
+    results = [
+        hit(5, 0, "Der Butler war in der Bibliothek", [1, 0, 0]),
+        hit(12, 0, "Inspektor", [0, 1, 0]),
+    ]
+    selected, passages, stats = build_context(results, count_words, token_budget=100)
+
+    assert [r["page_number"] for r in selected] == [5, 12]
+    assert passages == ["Der Butler war in der Bibliothek", "Inspektor"]
+    assert stats["chunks_used"] == 2
+    assert stats["duplicates_dropped"] == 0
+    assert stats["context_tokens"] == 7
+
+
+def test_neighbors_are_keyed_by_page():
+    # Nachbar chunk_id 1 auf Seite 5 ist nicht der Treffer chunk_id 1 auf Seite 9
+    results = [
+        hit(5, 0, "a b", [1, 0, 0], neighbor_ids=[1], neighbor_contents=["c d e"]),
+        hit(9, 1, "x", [0, 1, 0]),
+    ]
+    selected, passages, stats = build_context(results, count_words, token_budget=100)
+
+    assert passages == ["a b c d e", "x"]
+    assert stats["neighbors_added"] == 1
+    assert stats["context_tokens"] == 6
+
+
+def test_neighbor_of_better_hit_is_not_repeated():
+    results = [
+        hit(3, 4, "a", [1, 0, 0], neighbor_ids=[5], neighbor_contents=["b"]),
+        hit(3, 5, "b", [0, 1, 0]),
+    ]
+    selected, passages, stats = build_context(results, count_words, token_budget=100)
+
+    assert passages == ["a b"]
+    assert stats["duplicates_dropped"] == 1
+
+
+def test_near_duplicates_and_budget():
+    results = [
+        hit(1, 0, "eins zwei drei", [1, 0, 0]),
+        hit(2, 0, "eins zwei drei", [0.999, 0.01, 0]),
+        hit(3, 0, "viel " * 20, [0, 0, 1]),
+        hit(4, 0, "kurz", [0, 1, 0]),
+    ]
+    selected, passages, stats = build_context(results, count_words, token_budget=5)
+
+    assert [r["page_number"] for r in selected] == [1, 4]
+    assert stats["duplicates_dropped"] == 1
+    assert stats["over_budget_dropped"] == 1
+    assert stats["context_tokens"] == 4
+
+
+def test_top_hit_longer_than_budget_is_truncated():
+    selected, passages, stats = build_context([hit(1, 0, "w " * 50, [1, 0, 0])], count_words, token_budget=10)
+
+    assert len(passages[0].split()) == 10
+    assert stats["context_tokens"] == 10
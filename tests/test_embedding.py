@@ -0,0 +1,86 @@
+"""
+Tests für das Micro-Batching der Frage-Embeddings (api/embedding.py)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from embedding import EmbeddingBatcher
+
+
+class FakeExecutor:
+    """Kodiert jeden Text als seine Länge und merkt sich die Batches"""
+
+    def __init__(self, error=None):
+        self.batches = []
+        self.error = error
+
+    async def encode(self, texts):
+        self.batches.append(list(texts))
+        if self.error is not None:
+            raise self.error
+        return [len(text) for text in texts]
+
+
+def test_full_batch_is_flushed_without_waiting():
+    async def scenario():
+        executor = FakeExecutor()
+        # Wartezeit so lang, dass nur die Batch-Größe den Batch auslösen kann
+        batcher = EmbeddingBatcher(executor, max_batch_size=3, max_wait_ms=60_000)
+        texts = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff"]
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.encode_one(text) for text in texts)), timeout=1
+        )
+        return executor.batches, results
+
+    batches, results = asyncio.run(scenario())
+
+    assert batches == [["a", "bb", "ccc"], ["dddd", "eeeee", "ffffff"]]
+    assert results == [1, 2, 3, 4, 5, 6]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    async def scenario():
+        executor = FakeExecutor()
+        batcher = EmbeddingBatcher(executor, max_batch_size=32, max_wait_ms=10)
+        results = await asyncio.wait_for(
+            asyncio.gather(batcher.encode_one("a"), batcher.encode_one("bb")), timeout=1
+        )
+        return executor.batches, results
+
+    batches, results = asyncio.run(scenario())
+
+    assert batches == [["a", "bb"]]
+    assert results == [1, 2]
+
+
+def test_cancelled_caller_is_not_encoded():
+    async def scenario():
+        executor = FakeExecutor()
+        batcher = EmbeddingBatcher(executor, max_batch_size=32, max_wait_ms=10)
+        cancelled = asyncio.create_task(batcher.encode_one("weg"))
+        kept = asyncio.create_task(batcher.encode_one("da"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return executor.batches, await asyncio.wait_for(kept, timeout=1)
+
+    batches, result = asyncio.run(scenario())
+
+    assert batches == [["da"]]
+    assert result == 2
+
+
+def test_executor_error_reaches_every_caller():
+    async def scenario():
+        batcher = EmbeddingBatcher(FakeExecutor(error=RuntimeError("Modell weg")), max_wait_ms=1)
+        return await asyncio.gather(
+            batcher.encode_one("a"), batcher.encode_one("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+
+    assert [str(e) for e in results] == ["Modell weg", "Modell weg"]
+    assert all(isinstance(e, RuntimeError) for e in results)
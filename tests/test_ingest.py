@@ -0,0 +1,57 @@
+"""
+Tests für den Abgleich alter und neuer Chunks beim Aktualisieren (api/ingest.py)
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from ingest import diff_chunks
+
+
+def row(id, content, page, chunk_id):
+    return {"id": id, "content": content, "page_number": page, "chunk_id": chunk_id}
+
+
+def chunk(text, page, chunk_index):
+    return {"text": text, "page": page, "chunk_index": chunk_index}
+
+
+def key(text):
+    return text.lower()
+
+
+def test_identical_book_is_unchanged():
+    old = [row(1, "A", 1, 0), row(2, "B", 1, 1)]
+    new = [chunk("A", 1, 0), chunk("B", 1, 1)]
+    assert diff_chunks(old, new, key) == (2, [], [], [])
+
+
+def test_added_removed_and_moved_chunks():
+    old = [row(1, "A", 1, 0), row(2, "B", 1, 1), row(3, "C", 2, 0)]
+    # B gelöscht, C eine Seite nach vorn, D neu
+    new = [chunk("A", 1, 0), chunk("C", 1, 1), chunk("D", 2, 0)]
+    unchanged, moved, added, removed = diff_chunks(old, new, key)
+
+    assert unchanged == 1
+    assert moved == [(3, 1, 1)]
+    assert added == [new[2]]
+    assert removed == [2]
+
+
+def test_duplicate_contents_are_matched_in_reading_order():
+    # Gleicher Inhalt zweimal: Zuordnung nach Lesereihenfolge, nicht nach id
+    old = [row(7, "X", 2, 0), row(5, "X", 1, 0)]
+    new = [chunk("X", 1, 0)]
+    unchanged, moved, added, removed = diff_chunks(old, new, key)
+
+    assert (unchanged, moved, added) == (1, [], [])
+    assert removed == [7]
+
+
+def test_missing_page_counts_as_page_zero():
+    # DOCX/TXT haben keine Seiten, gespeichert wird page_number 0
+    old = [row(1, "A", 0, 0)]
+    new = [chunk("A", None, 0)]
+    assert diff_chunks(old, new, key) == (1, [], [], [])
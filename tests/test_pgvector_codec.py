@@ -0,0 +1,39 @@
+"""
+Tests für den binären pgvector-Codec (api/pgvector_codec.py)
+"""
+
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from pgvector_codec import decode_vector, encode_vector
+
+
+def test_round_trip_keeps_values():
+    values = np.array([0.5, -1.25, 3.0, 1e-3], dtype=np.float32)
+    decoded = decode_vector(bytes(encode_vector(values)))
+
+    assert decoded.dtype.kind == "f" and decoded.itemsize == 4
+    np.testing.assert_array_equal(decoded, values)
+
+
+def test_wire_format_matches_pgvector():
+    # uint16 Dimension, uint16 unbenutzt, float32 big endian
+    data = bytes(encode_vector([1.0, 2.0]))
+    assert data == struct.pack(">HHff", 2, 0, 1.0, 2.0)
+
+
+def test_lists_and_float64_are_accepted():
+    decoded = decode_vector(bytes(encode_vector(np.array([0.25, 0.75]))))
+    np.testing.assert_array_equal(decoded, [0.25, 0.75])
+    np.testing.assert_array_equal(decode_vector(bytes(encode_vector([1, 2, 3]))), [1, 2, 3])
+
+
+def test_only_one_dimensional_arrays():
+    with pytest.raises(ValueError):
+        encode_vector(np.zeros((2, 2)))
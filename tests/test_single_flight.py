@@ -0,0 +1,105 @@
+"""
+Tests für das Zusammenfassen gleicher Anfragen (api/single_flight.py)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "api"))
+
+from single_flight import SingleFlight
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_late_subscriber_gets_earlier_events():
+    async def scenario():
+        flights = SingleFlight()
+        gate = asyncio.Event()
+        calls = 0
+
+        async def produce(publish):
+            nonlocal calls
+            calls += 1
+            publish("a")
+            publish("b")
+            await gate.wait()
+            publish("c")
+
+        first, first_created = flights.join("frage", produce)
+        first_events = asyncio.create_task(collect(first))
+        await asyncio.sleep(0)  # "a" und "b" sind veröffentlicht
+
+        second, second_created = flights.join("frage", produce)
+        gate.set()
+        return calls, first_created, second_created, await first_events, await collect(second), flights.stats()
+
+    calls, first_created, second_created, first, second, stats = asyncio.run(scenario())
+
+    assert calls == 1
+    assert (first_created, second_created) == (True, False)
+    assert first == second == ["a", "b", "c"]
+    assert stats["in_flight"] == 0
+    assert stats["coalesced"] == 1
+
+
+def test_error_is_raised_for_every_subscriber_after_events():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def produce(publish):
+            publish("a")
+            await asyncio.sleep(0)
+            raise RuntimeError("LLM weg")
+
+        first, _ = flights.join("frage", produce)
+        second, _ = flights.join("frage", produce)
+        received = []
+        for events in (first, second):
+            with pytest.raises(RuntimeError, match="LLM weg"):
+                async for event in events:
+                    received.append(event)
+        return received
+
+    assert asyncio.run(scenario()) == ["a", "a"]
+
+
+def test_work_is_cancelled_when_last_subscriber_leaves():
+    async def scenario():
+        flights = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def produce(publish):
+            publish("a")
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        first, _ = flights.join("frage", produce)
+        second, _ = flights.join("frage", produce)
+        assert await first.__anext__() == "a"
+        assert await second.__anext__() == "a"
+
+        # Ein Abonnent geht: Arbeit läuft weiter
+        await first.aclose()
+        await asyncio.sleep(0)
+        still_running = not cancelled.is_set()
+
+        # Der letzte geht: Arbeit wird abgebrochen, neue Anfragen starten frisch
+        await second.aclose()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        _, restarted = flights.join("frage", produce)
+        return still_running, restarted, flights.stats()
+
+    still_running, restarted, stats = asyncio.run(scenario())
+
+    assert still_running
+    assert restarted
+    assert stats["cancelled"] == 1